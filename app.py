@@ -1,106 +1,321 @@
-from flask import Flask, render_template, request, session, redirect, url_for, jsonify
+from flask import (Flask, Response, render_template, request, session, redirect, url_for,
+                   jsonify, stream_with_context, g)
 import numpy as np
-import pickle
 import os
 from datetime import datetime
 import uuid
-from flask_sqlalchemy import SQLAlchemy
+import csv
+import io
+from database import (db, Prediction, SessionStats, init_db, create_tables, persist_predictions,
+                      rebuild_session_stats, fetch_history_page)
+from model_registry import ModelRegistry, ModelStore, LIVE, CANDIDATE
+from storage import configure_storage
+from write_behind import WriteBehindQueue
+from prediction_cache import PredictionCache
+from instrumentation import Metrics, ProfilerSwitch, SamplingProfiler, configure_logging
+from features import SCHEMA, FEATURE_COLUMNS, FLOAT_FEATURES, FEATURE_LABELS, build_feature_matrix
+from micro_batcher import MicroBatcher, BatcherFull
+from drift import DriftMonitor
+from page_cache import PageCache, StaticAssets
+from concurrent.futures import TimeoutError as FutureTimeout
+from export import EXPORT_FORMATS, export_query, export_stream, parse_day, pyarrow_available
+from retention import run_retention, enable_incremental_vacuum, append_report
+import threading
+import time
+import hmac
+import json
+import click
+import logging
 
 # ==================== FLASK APP SETUP ====================
 app = Flask(__name__)
+configure_logging()
+logger = logging.getLogger('loan.app')
+metrics = Metrics()
+profiler = SamplingProfiler()
+# Shared on/off state so an admin toggle reaches every gunicorn worker
+profiler_switch = ProfilerSwitch(profiler, os.path.join(app.instance_path, 'profiler'))
 app.secret_key = 'loan_prediction_secret_key_2024'
 
 # ==================== DATABASE SETUP ====================
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///predictions.db'
+# sqlite:///predictions.db with the tuned SQLite profile unless DATABASE_URL /
+# STORAGE_PROFILE say otherwise (see storage.py)
+configure_storage(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+app.config['BATCH_MAX_ROWS'] = 100000
+app.config['HISTORY_PAGE_SIZE'] = 20
+app.config['EXPORT_CHUNK_SIZE'] = 5000
+app.config['WHATIF_MAX_POINTS'] = 250000
+init_db(app)
 
-# Database Table for storing predictions
-class Prediction(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.String(100), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Form data
-    Gender = db.Column(db.Integer)
-    Married = db.Column(db.Integer)
-    Dependents = db.Column(db.Integer)
-    Education = db.Column(db.Integer)
-    Self_Employed = db.Column(db.Integer)
-    ApplicantIncome = db.Column(db.Float)
-    CoapplicantIncome = db.Column(db.Float)
-    LoanAmount = db.Column(db.Float)
-    Loan_Amount_Term = db.Column(db.Float)
-    Credit_History = db.Column(db.Float)
-    Property_Area = db.Column(db.Integer)
-    
-    # Results
-    prediction_result = db.Column(db.Integer)
-    confidence = db.Column(db.Float)
-    total_income = db.Column(db.Float)
-    loan_to_income_ratio = db.Column(db.Float)
+# Retention: sessions idle for RETENTION_TTL_DAYS are archived to monthly
+# gzip CSV partitions and deleted in small transactions (flask retention)
+app.config['RETENTION_TTL_DAYS'] = float(os.environ.get('RETENTION_TTL_DAYS', 90))
+app.config['RETENTION_ARCHIVE_DIR'] = os.environ.get(
+    'RETENTION_ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+app.config['RETENTION_CHUNK_SIZE'] = int(os.environ.get('RETENTION_CHUNK_SIZE', 500))
+app.config['RETENTION_PAUSE_MS'] = float(os.environ.get('RETENTION_PAUSE_MS', 10))
 
-# Create tables
-with app.app_context():
-    db.create_all()
-    print("✅ Database created successfully!")
+# Opt-in write-behind: /result queues rows and a background worker
+# group-commits them instead of committing inside the request
+app.config['WRITE_BEHIND'] = os.environ.get('WRITE_BEHIND', '0') == '1'
+app.config['WRITE_BEHIND_QUEUE_SIZE'] = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+app.config['WRITE_BEHIND_BATCH_SIZE'] = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+app.config['WRITE_BEHIND_INTERVAL'] = float(os.environ.get('WRITE_BEHIND_INTERVAL', 0.05))
+app.config['WRITE_BEHIND_RETRIES'] = int(os.environ.get('WRITE_BEHIND_RETRIES', 3))
+
+write_queue = None
+if app.config['WRITE_BEHIND']:
+    write_queue = WriteBehindQueue(
+        app, persist_predictions,
+        max_size=app.config['WRITE_BEHIND_QUEUE_SIZE'],
+        batch_size=app.config['WRITE_BEHIND_BATCH_SIZE'],
+        flush_interval=app.config['WRITE_BEHIND_INTERVAL'],
+        retries=app.config['WRITE_BEHIND_RETRIES']
+    ).start()
+    logger.info("event=write_behind_enabled queue_size=%d", app.config['WRITE_BEHIND_QUEUE_SIZE'])
 
 # ==================== LOAD ML MODEL ====================
-MODEL_PATH = os.path.join("model", "loan_model.pkl")
-try:
-    model = pickle.load(open(MODEL_PATH, "rb"))
-    print("✅ ML Model loaded successfully!")
-except:
-    model = None
-    print("⚠️ Model not found - running without ML")
+# Folded scaler + linear SVM weights exported by model/export_weights.py
+# (loading them needs only NumPy, not scikit-learn). Loaded on first use,
+# or up front with PRELOAD_MODEL=1 (e.g. before forking workers).
+# When model/versions/LIVE exists the live version comes from the store.
+MODEL_PATH = os.path.join(app.root_path, "model", "loan_weights.json")
+MODEL_STORE = os.path.join(app.root_path, "model", "versions")
+models = ModelRegistry(MODEL_PATH, store=ModelStore(MODEL_STORE))
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+
+# ==================== PREDICTION CACHE ====================
+# Resubmitted forms skip scoring; keys include the model version
+app.config['PREDICTION_CACHE_SIZE'] = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+app.config['PREDICTION_CACHE_TTL'] = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+prediction_cache = PredictionCache(app.config['PREDICTION_CACHE_SIZE'], app.config['PREDICTION_CACHE_TTL'])
+models.on_reload(lambda model: prediction_cache.clear())
+
+# ==================== DRIFT MONITOR ====================
+# Scored rows are sketched and compared with the training baseline stored in
+# the weights file; the live counts halve every DRIFT_WINDOW rows
+app.config['DRIFT_WINDOW'] = int(os.environ.get('DRIFT_WINDOW', 10000))
+app.config['DRIFT_MIN_ROWS'] = int(os.environ.get('DRIFT_MIN_ROWS', 100))
+drift_monitor = DriftMonitor(app.config['DRIFT_WINDOW'], app.config['DRIFT_MIN_ROWS'])
+models.on_reload(lambda model: drift_monitor.set_baseline(model.drift_baseline, model.version))
+
+def score_one(model, features):
+    """(prediction, confidence) for one applicant, served from the cache when possible"""
+    key = (model.version, tuple(float(v) for v in features))
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        return cached
+    scored = (int(model.predict([features])[0]), float(model.confidence([features])[0]))
+    prediction_cache.put(key, scored)
+    return scored
+
+# ==================== MICRO-BATCHING ====================
+# /api/score requests arriving within MICRO_BATCH_WINDOW_MS of each other are
+# scored together (up to MICRO_BATCH_MAX_SIZE rows per predict call)
+app.config['MICRO_BATCH_WINDOW_MS'] = float(os.environ.get('MICRO_BATCH_WINDOW_MS', 2))
+app.config['MICRO_BATCH_MAX_SIZE'] = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+app.config['MICRO_BATCH_TIMEOUT'] = float(os.environ.get('MICRO_BATCH_TIMEOUT', 2))
+
+def score_micro_batch(X):
+    """Score one micro-batch with the live model; one (prediction, confidence, version, size) per row"""
+    model = models.get()
+    start = time.perf_counter()
+    predictions = model.predict(X).astype(int)
+    live_seconds = time.perf_counter() - start
+    shadow_score(X, predictions, live_seconds)
+    confidence = model.confidence(X)
+    metrics.observe('micro_batch_seconds', live_seconds)
+    drift_monitor.observe(X)
+    return [(int(p), float(c), model.version, len(X)) for p, c in zip(predictions, confidence)]
+
+micro_batcher = MicroBatcher(
+    score_micro_batch,
+    max_batch=app.config['MICRO_BATCH_MAX_SIZE'],
+    window=app.config['MICRO_BATCH_WINDOW_MS'] / 1000
+)
+
+# ==================== PAGE CACHE ====================
+# home/about/predict/contact render the same HTML for everyone: render once,
+# keep gzip (and brotli, if installed) variants and answer conditional GETs.
+# Static files get content-fingerprinted /assets/ URLs cached for a year.
+# Both are built in warm_up(), so importing the app still reads nothing.
+app.config['PAGE_CACHE'] = os.environ.get('PAGE_CACHE', '1') == '1'
+page_cache = PageCache(app.config['PAGE_CACHE'])
+static_assets = StaticAssets(app.static_folder)
+app.jinja_env.globals['asset_url'] = static_assets.url
+
+STATIC_PAGES = {
+    'home': lambda: render_template("index.html"),
+    'about': lambda: render_template("about.html"),
+    'predict': lambda: render_template("predict.html"),
+    'contact': lambda: render_template("contact.html"),
+}
+
+# ==================== STARTUP / WARM-UP ====================
+_warm_lock = threading.Lock()
+_warmed_up = False
+
+def warm_up():
+    """Create tables and load + exercise the model; safe to call more than once"""
+    global _warmed_up
+    with _warm_lock:
+        if _warmed_up:
+            return
+        create_tables(app)
+        models.warm_up()
+        static_assets.scan()
+        with app.test_request_context():
+            page_cache.build(STATIC_PAGES)
+        _warmed_up = True
+
+@app.before_request
+def ensure_warm():
+    if not _warmed_up:
+        warm_up()
+
+if os.environ.get('PRELOAD_MODEL', '0') == '1':
+    warm_up()
+
+# ==================== WORKER LIFECYCLE ====================
+worker_state = {'started': time.time(), 'requests': 0}
+
+def after_fork():
+    """Per-worker setup for pre-fork servers (called from gunicorn's post_fork).
+
+    The model and templates loaded before fork stay shared copy-on-write;
+    DB connections and background threads must not be shared.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if write_queue is not None:
+        write_queue.after_fork()
+    micro_batcher.after_fork()
+    drift_monitor.after_fork()
+    profiler_switch.after_fork()
+    worker_state.update(started=time.time(), requests=0)
+
+# ==================== HELPERS ====================
+def parse_form(data):
+    """Validate and encode the prediction form against the feature schema.
+
+    Returns (form_data, feature list); raises ValueError naming each bad field.
+    """
+    return SCHEMA.validate_one(data)
+
+def calculate_emi(principal, months, annual_rate=8.5):
+    """Calculate EMI (Equated Monthly Installment)"""
+    if months == 0:
+        return 0
+    monthly_rate = annual_rate / (12 * 100)
+    if monthly_rate == 0:
+        return principal / months
+    emi = principal * monthly_rate * ((1 + monthly_rate) ** months) / (((1 + monthly_rate) ** months) - 1)
+    return emi
+
+def calculate_emi_vectorized(principal, months, annual_rate=8.5):
+    """calculate_emi over NumPy arrays (broadcast); 0 where months is 0"""
+    principal = np.asarray(principal, dtype=np.float64)
+    months = np.asarray(months, dtype=np.float64)
+    monthly_rate = annual_rate / (12 * 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if monthly_rate == 0:
+            emi = principal / months
+        else:
+            growth = (1 + monthly_rate) ** months
+            emi = principal * monthly_rate * growth / (growth - 1)
+    return np.where(months == 0, 0.0, emi)
+
+# ==================== BATCH HELPERS ====================
+def shadow_score(X, live_predictions, live_seconds):
+    """Score X with the candidate model (if any) and record agreement and latency"""
+    candidate = models.candidate
+    if candidate is None:
+        return
+    start = time.perf_counter()
+    candidate_predictions = candidate.predict(X)
+    candidate_seconds = time.perf_counter() - start
+    agree = int((candidate_predictions == live_predictions).sum())
+    models.shadow.record(len(X), agree, live_seconds, candidate_seconds)
+
+def read_batch_records():
+    """Read applicants from a JSON body or an uploaded CSV file"""
+    if 'file' in request.files:
+        text = io.TextIOWrapper(request.files['file'].stream, encoding='utf-8')
+        return list(csv.DictReader(text))
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('applicants')
+    if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+        raise ValueError("Expected a JSON list of applicants or a CSV file upload")
+    return payload
 
 # ==================== ROUTES ====================
 @app.route("/")
 def home():
-    return render_template("index.html")
+    return page_cache.serve('home', STATIC_PAGES['home'])
 
 @app.route("/about")
 def about():
-    return render_template("about.html")
+    return page_cache.serve('about', STATIC_PAGES['about'])
 
 @app.route("/predict")
 def predict():
-    return render_template("predict.html")
+    return page_cache.serve('predict', STATIC_PAGES['predict'])
 
 @app.route("/contact")
 def contact():
-    return render_template("contact.html")
+    return page_cache.serve('contact', STATIC_PAGES['contact'])
+
+@app.route("/assets/<path:filename>")
+def asset(filename):
+    entry = static_assets.get(filename)
+    if entry is None:
+        return jsonify({'error': 'Not found'}), 404
+    return entry.respond()
 
 # ===== NEW: HISTORY PAGE =====
+def history_item(p):
+    """Shape one history row for the template / JSON"""
+    return {
+        'id': p.id,
+        'timestamp': p.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'result': 'APPROVED' if p.prediction_result == 1 else 'REJECTED',
+        'loan_amount': p.LoanAmount,
+        'applicant_income': p.ApplicantIncome,
+        'coapplicant_income': p.CoapplicantIncome,
+        'total_income': p.total_income,
+        'confidence': p.confidence,
+        'gender': SCHEMA['Gender'].describe(p.Gender),
+        'married': SCHEMA['Married'].describe(p.Married),
+        'dependents': SCHEMA['Dependents'].describe(p.Dependents)
+    }
+
+def history_page():
+    """Current session's history page from the ?cursor= / ?limit= query args"""
+    if 'session_id' not in session:
+        return [], None
+    limit = request.args.get('limit', app.config['HISTORY_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, 100))
+    rows, next_cursor = fetch_history_page(session['session_id'], request.args.get('cursor'), limit)
+    return [history_item(p) for p in rows], next_cursor
+
 @app.route("/history")
 def history():
-    # Get user's session ID
-    if 'session_id' not in session:
-        return render_template("history.html", predictions=[])
-    
-    # Fetch predictions from database
-    predictions = Prediction.query.filter_by(
-        session_id=session['session_id']
-    ).order_by(Prediction.timestamp.desc()).all()
-    
-    # Convert to list for template
-    pred_list = []
-    for p in predictions:
-        pred_list.append({
-            'id': p.id,
-            'timestamp': p.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'result': 'APPROVED' if p.prediction_result == 1 else 'REJECTED',
-            'loan_amount': p.LoanAmount,
-            'applicant_income': p.ApplicantIncome,
-            'coapplicant_income': p.CoapplicantIncome,
-            'total_income': p.total_income,
-            'confidence': p.confidence,
-            'gender': 'Male' if p.Gender == 1 else 'Female',
-            'married': 'Yes' if p.Married == 1 else 'No',
-            'dependents': p.Dependents
-        })
-    
-    return render_template("history.html", predictions=pred_list)
+    try:
+        pred_list, next_cursor = history_page()
+    except ValueError:
+        return redirect(url_for('history'))
+    return render_template("history.html", predictions=pred_list, next_cursor=next_cursor)
+
+@app.route("/api/history")
+def api_history():
+    try:
+        pred_list, next_cursor = history_page()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({'predictions': pred_list, 'next_cursor': next_cursor})
 
 # ===== NEW: CLEAR HISTORY =====
 @app.route("/clear_history", methods=["POST"])
@@ -108,41 +323,37 @@ def clear_history():
     if 'session_id' in session:
         try:
             deleted = Prediction.query.filter_by(session_id=session['session_id']).delete()
+            SessionStats.query.filter_by(session_id=session['session_id']).delete()
             db.session.commit()
             return jsonify({'success': True, 'deleted': deleted})
-        except:
+        except Exception as e:
+            db.session.rollback()
+            logger.error("event=clear_history_failed error=%r", str(e))
             return jsonify({'success': False})
     return jsonify({'success': False})
 
 # ===== PREDICTION RESULT =====
 @app.route("/result", methods=["POST"])
 def result():
+    model = models.get()
     if not model:
         return "Model error", 500
     
     try:
-        # Get form data
-        data = request.form
-        
-        # Convert to correct types
-        form_data = {}
-        for key in data:
-            if key in ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount', 'Loan_Amount_Term', 'Credit_History']:
-                form_data[key] = float(data[key])
-            else:
-                form_data[key] = int(data[key])
-        
-        # Prepare features for ML model
-        features = [
-            form_data['Gender'], form_data['Married'], form_data['Dependents'],
-            form_data['Education'], form_data['Self_Employed'], form_data['ApplicantIncome'],
-            form_data['CoapplicantIncome'], form_data['LoanAmount'], form_data['Loan_Amount_Term'],
-            form_data['Credit_History'], form_data['Property_Area']
-        ]
-        
+        # Get form data and convert to correct types
+        with metrics.timer('stage_seconds', stage='parse'):
+            form_data, features = parse_form(request.form)
+    except (KeyError, ValueError) as e:
+        metrics.inc('validation_failures_total', endpoint='result')
+        logger.info("event=validation_failed endpoint=result error=%r", str(e))
+        return f"Error processing request: {str(e)}", 400
+
+    try:
         # Make prediction
-        prediction = model.predict([features])[0]
-        confidence = 83  # Default confidence
+        with metrics.timer('stage_seconds', stage='predict'):
+            prediction, confidence = score_one(model, features)
+        metrics.inc('predictions_total', result='approved' if prediction == 1 else 'rejected')
+        drift_monitor.observe_row(features)
         
         # Generate session ID if not exists
         if 'session_id' not in session:
@@ -152,59 +363,537 @@ def result():
         total_income = form_data['ApplicantIncome'] + form_data['CoapplicantIncome']
         loan_to_income = form_data['LoanAmount'] / total_income if total_income > 0 else 0
         
-        # Save to database
-        pred = Prediction(
-            session_id=session['session_id'],
-            Gender=form_data['Gender'],
-            Married=form_data['Married'],
-            Dependents=form_data['Dependents'],
-            Education=form_data['Education'],
-            Self_Employed=form_data['Self_Employed'],
-            ApplicantIncome=form_data['ApplicantIncome'],
-            CoapplicantIncome=form_data['CoapplicantIncome'],
-            LoanAmount=form_data['LoanAmount'],
-            Loan_Amount_Term=form_data['Loan_Amount_Term'],
-            Credit_History=form_data['Credit_History'],
-            Property_Area=form_data['Property_Area'],
-            prediction_result=int(prediction),
-            confidence=confidence,
-            total_income=total_income,
-            loan_to_income_ratio=loan_to_income
-        )
+        # Save to database (queued when write-behind is on and has room)
+        with metrics.timer('stage_seconds', stage='persist'):
+            row = {col: form_data[col] for col in FEATURE_COLUMNS}
+            row.update(
+                session_id=session['session_id'],
+                timestamp=datetime.utcnow(),
+                prediction_result=int(prediction),
+                confidence=confidence,
+                total_income=total_income,
+                loan_to_income_ratio=loan_to_income,
+                model_version=model.version
+            )
+            queued = write_queue is not None and write_queue.submit(row)
+            if not queued:
+                persist_predictions([row])
+        logger.debug("event=prediction_saved result=%d confidence=%.1f queued=%s",
+                     prediction, confidence, queued)
         
-        db.session.add(pred)
-        db.session.commit()
-        print(f"✅ Prediction saved to database (ID: {pred.id})")
+        # Top factors behind the decision (exact for the linear model)
+        explanation = model.explain([features], top=5)
+        factors = [
+            {'label': FEATURE_LABELS[name], 'contribution': round(value, 3),
+             'direction': 'towards approval' if value > 0 else 'towards rejection'}
+            for name, value in explanation[0]
+        ] if explanation else []
         
         # Return result page
-        return render_template("result.html", 
-                             result=int(prediction),
-                             confidence=confidence,
-                             loan_amount=form_data['LoanAmount'],
-                             total_income=total_income,
-                             loan_to_income_ratio=round(loan_to_income, 2))
+        with metrics.timer('stage_seconds', stage='render'):
+            return render_template("result.html", 
+                                 result=int(prediction),
+                                 confidence=confidence,
+                                 loan_amount=form_data['LoanAmount'],
+                                 total_income=total_income,
+                                 loan_to_income_ratio=round(loan_to_income, 2),
+                                 factors=factors)
                              
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
+        metrics.inc('errors_total', endpoint='result')
+        logger.exception("event=prediction_failed error=%r", str(e))
         return f"Error processing request: {str(e)}", 400
 
 # ===== STATISTICS API =====
 @app.route("/api/stats")
 def get_stats():
     if 'session_id' not in session:
-        return jsonify({'total': 0, 'approved': 0, 'rejected': 0})
-    
-    predictions = Prediction.query.filter_by(session_id=session['session_id']).all()
-    total = len(predictions)
-    approved = sum(1 for p in predictions if p.prediction_result == 1)
+        return jsonify({'total': 0, 'approved': 0, 'rejected': 0, 'avg_confidence': 0})
     
+    stats = db.session.get(SessionStats, session['session_id'])
+    if stats is None:
+        return jsonify({'total': 0, 'approved': 0, 'rejected': 0, 'approval_rate': 0, 'avg_confidence': 0})
+    return jsonify(stats.to_dict())
+
+# ===== BATCH SCORING API =====
+@app.route("/api/predict_batch", methods=["POST"])
+def predict_batch():
+    """Score many applicants with one vectorized predict and one bulk insert"""
+    model = models.get()
+    if not model:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    try:
+        with metrics.timer('batch_stage_seconds', stage='parse'):
+            records = read_batch_records()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not records:
+        return jsonify({'error': 'No applicants supplied'}), 400
+    explain_top = request.args.get('explain', 0, type=int)
+    if len(records) > app.config['BATCH_MAX_ROWS']:
+        return jsonify({'error': f"Batch too large (max {app.config['BATCH_MAX_ROWS']} rows)"}), 413
+
+    with metrics.timer('batch_stage_seconds', stage='validate'):
+        matrix, valid, errors = build_feature_matrix(records)
+    rows = np.flatnonzero(valid)
+    X = matrix[valid]
+
+    results = []
+    if len(rows):
+        start = time.perf_counter()
+        predictions = model.predict(X).astype(int)
+        live_seconds = time.perf_counter() - start
+        metrics.observe('batch_stage_seconds', live_seconds, stage='predict')
+        shadow_score(X, predictions, live_seconds)
+        drift_monitor.observe(X)
+        confidence = model.confidence(X)
+        explanations = model.explain(X, top=explain_top) if explain_top > 0 else None
+
+        total_income = X[:, 5] + X[:, 6]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loan_to_income = np.where(total_income > 0, X[:, 7] / total_income, 0.0)
+
+        if 'session_id' not in session:
+            session['session_id'] = str(uuid.uuid4())
+        session_id = session['session_id']
+        timestamp = datetime.utcnow()
+
+        # One executemany INSERT inside a single transaction
+        columns = {}
+        for j, col in enumerate(FEATURE_COLUMNS):
+            values = X[:, j] if col in FLOAT_FEATURES else X[:, j].astype(int)
+            columns[col] = values.tolist()
+        columns['prediction_result'] = predictions.tolist()
+        columns['confidence'] = confidence.tolist()
+        columns['total_income'] = total_income.tolist()
+        columns['loan_to_income_ratio'] = loan_to_income.tolist()
+        keys = list(columns)
+        db_rows = [
+            dict(zip(keys, values), session_id=session_id, timestamp=timestamp,
+                 model_version=model.version)
+            for values in zip(*columns.values())
+        ]
+        try:
+            with metrics.timer('batch_stage_seconds', stage='persist'):
+                persist_predictions(db_rows)
+        except Exception as e:
+            metrics.inc('errors_total', endpoint='predict_batch')
+            logger.error("event=batch_insert_failed rows=%d error=%r", len(db_rows), str(e))
+            return jsonify({'error': 'Could not save predictions'}), 500
+
+        for k, i in enumerate(rows):
+            results.append({
+                'row': int(i),
+                'result': 'APPROVED' if predictions[k] == 1 else 'REJECTED',
+                'prediction': int(predictions[k]),
+                'confidence': float(confidence[k]),
+                'total_income': float(total_income[k]),
+                'loan_to_income_ratio': round(float(loan_to_income[k]), 2)
+            })
+            if explanations is not None:
+                results[-1]['explanation'] = [
+                    {'feature': name, 'contribution': round(value, 4)} for name, value in explanations[k]
+                ]
+
+    metrics.inc('batch_rows_total', len(rows), status='scored')
+    metrics.inc('batch_rows_total', len(errors), status='invalid')
+    logger.info("event=batch_scored rows=%d invalid=%d", len(rows), len(errors))
     return jsonify({
-        'total': total,
-        'approved': approved,
-        'rejected': total - approved,
-        'approval_rate': round((approved/total*100), 1) if total > 0 else 0
+        'total': len(records),
+        'scored': len(results),
+        'failed': len(errors),
+        'results': results,
+        'errors': errors
     })
 
+# ===== SINGLE-APPLICANT JSON API =====
+@app.route("/api/score", methods=["POST"])
+def score():
+    """Score one applicant from a JSON body via the micro-batcher; nothing is saved"""
+    if not models.get():
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    applicant = request.get_json(silent=True)
+    if not isinstance(applicant, dict):
+        return jsonify({'error': 'Expected a JSON object with the applicant fields'}), 400
+    try:
+        _, features = SCHEMA.validate_one(applicant)
+    except ValueError as e:
+        metrics.inc('validation_failures_total', endpoint='score')
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        prediction, confidence, version, batch_size = micro_batcher.score(
+            features, timeout=app.config['MICRO_BATCH_TIMEOUT'])
+    except BatcherFull as e:
+        metrics.inc('errors_total', endpoint='score')
+        return jsonify({'error': str(e)}), 503
+    except FutureTimeout:
+        metrics.inc('errors_total', endpoint='score')
+        return jsonify({'error': 'Scoring timed out'}), 504
+    metrics.inc('predictions_total', result='approved' if prediction == 1 else 'rejected')
+
+    total_income = features[5] + features[6]
+    loan_to_income = features[7] / total_income if total_income > 0 else 0.0
+    return jsonify({
+        'result': 'APPROVED' if prediction == 1 else 'REJECTED',
+        'prediction': prediction,
+        'confidence': confidence,
+        'total_income': float(total_income),
+        'loan_to_income_ratio': round(float(loan_to_income), 2),
+        'model_version': version,
+        'batch_size': batch_size
+    })
+
+@app.route("/api/micro_batch")
+def micro_batch_metrics():
+    return jsonify(micro_batcher.metrics())
+
+# ===== WHAT-IF SENSITIVITY API =====
+WHATIF_AXES = ['LoanAmount', 'Loan_Amount_Term', 'CoapplicantIncome']
+# Largest accepted annual_rate, in percent per year
+WHATIF_MAX_RATE = 100
+
+def whatif_axis_length(spec):
+    """Number of values an axis spec expands to, checked before anything is allocated"""
+    if spec is None:
+        return 1
+    if isinstance(spec, list):
+        return len(spec)
+    if isinstance(spec, dict):
+        steps = int(spec.get('steps', 20))
+        if steps < 1:
+            raise ValueError("steps must be at least 1")
+        return steps
+    raise ValueError("range must be a list or {min, max, steps}")
+
+def whatif_axis(name, spec, default):
+    """Values for one sweep axis: a list, {"min", "max", "steps"}, or the applicant's value"""
+    if spec is None:
+        return np.array([default], dtype=np.float64)
+    if isinstance(spec, list):
+        values = np.array(spec, dtype=np.float64)
+    else:
+        values = np.linspace(float(spec['min']), float(spec['max']), int(spec.get('steps', 20)))
+    if values.ndim != 1 or values.size == 0 or not np.isfinite(values).all():
+        raise ValueError(f"{name} must be a flat list of numbers")
+    feature = SCHEMA[name]
+    if np.isnan(feature.encode_column(values)).any():
+        raise ValueError(f"{name} must be {feature.rule()}")
+    return values
+
+@app.route("/api/whatif", methods=["POST"])
+def whatif():
+    """Score a grid of LoanAmount x Loan_Amount_Term x CoapplicantIncome for one applicant.
+
+    Nothing is written to the database. Returns the approval grid, approval
+    probabilities, the EMI for each (amount, term) and, for each (term,
+    co-applicant income), the largest loan amount that is approved.
+    """
+    model = models.get()
+    if not model:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    start = time.perf_counter()
+    body = request.get_json(silent=True)
+    applicant = body.get('applicant') if isinstance(body, dict) else None
+    ranges = (body.get('ranges') or {}) if isinstance(body, dict) else None
+    if not isinstance(applicant, dict) or not isinstance(ranges, dict):
+        return jsonify({'error': 'Expected {"applicant": {...}, "ranges": {...}}'}), 400
+    try:
+        base = np.array(SCHEMA.validate_one(applicant)[1], dtype=np.float64)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Size the grid from the specs alone so an oversized request allocates nothing
+    try:
+        shape = tuple(whatif_axis_length(ranges.get(name)) for name in WHATIF_AXES)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid range: {str(e)}'}), 400
+    try:
+        annual_rate = float(body.get('annual_rate', 8.5))
+    except (TypeError, ValueError):
+        annual_rate = None
+    # Rejects NaN too; above the cap the EMI overflows to NaN
+    if annual_rate is None or not 0 <= annual_rate <= WHATIF_MAX_RATE:
+        return jsonify({'error': f"annual_rate must be a number in [0, {WHATIF_MAX_RATE}]"}), 400
+    points = int(np.prod(shape, dtype=object))
+    if points > app.config['WHATIF_MAX_POINTS']:
+        return jsonify({'error': f"Grid too large ({points} points, max {app.config['WHATIF_MAX_POINTS']})"}), 413
+    try:
+        axes = [whatif_axis(name, ranges.get(name), base[FEATURE_COLUMNS.index(name)]) for name in WHATIF_AXES]
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid range: {str(e)}'}), 400
+
+    # One row per grid point, varying only the three swept columns
+    X = np.tile(base, (points, 1))
+    for name, grid in zip(WHATIF_AXES, np.meshgrid(*axes, indexing='ij')):
+        X[:, FEATURE_COLUMNS.index(name)] = grid.ravel()
+
+    approved = (model.predict(X) == 1).reshape(shape)
+    probability = model.predict_proba(X)
+    emi = calculate_emi_vectorized(axes[0][:, None], axes[1][None, :], annual_rate)
+
+    # Largest approved amount per (term, co-applicant income); None when nothing is approved
+    amounts = np.where(approved, axes[0][:, None, None], -np.inf).max(axis=0)
+    boundary = np.where(np.isfinite(amounts), amounts, np.nan)
+
+    return jsonify({
+        'axes': {name: a.tolist() for name, a in zip(WHATIF_AXES, axes)},
+        'approved': approved.astype(int).tolist(),
+        'probability': np.round(probability, 4).reshape(shape).tolist() if probability is not None else None,
+        'emi': np.round(emi, 2).tolist(),
+        'max_approved_loan_amount': [[None if np.isnan(v) else float(v) for v in row] for row in boundary],
+        'approval_rate': round(float(approved.mean() * 100), 1),
+        'points': points,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 3)
+    })
+
+# ===== WRITE-BEHIND METRICS =====
+@app.route("/api/write_queue")
+def write_queue_metrics():
+    if write_queue is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(write_queue.metrics(), enabled=True))
+
+# ===== DRIFT MONITOR =====
+@app.route("/api/drift")
+def drift():
+    """PSI / KS of recent scored applicants against the live model's training data"""
+    return jsonify(drift_monitor.report())
+
+# ===== WORKER HEALTH =====
+@app.route("/health")
+def health():
+    """Liveness of the worker process that served this request"""
+    return jsonify({
+        'status': 'ok',
+        'pid': os.getpid(),
+        'uptime_s': round(time.time() - worker_state['started'], 1),
+        'requests': worker_state['requests'],
+        'model_version': models.version
+    })
+
+# ===== READINESS =====
+@app.route("/ready")
+def ready():
+    """200 once the model is loaded and the database answers, 503 otherwise"""
+    checks = {'model': models.ready, 'database': True}
+    try:
+        db.session.execute(db.text("SELECT 1"))
+    except Exception:
+        checks['database'] = False
+    status = 200 if all(checks.values()) else 503
+    return jsonify(dict(checks, ready=status == 200, model_version=models.version,
+                        model_error=models.last_error)), status
+
+# ===== PREDICTION CACHE STATS =====
+@app.route("/api/cache_stats")
+def cache_stats():
+    return jsonify(dict(prediction_cache.stats(), model_version=models.version,
+                        pages=page_cache.stats(), assets=static_assets.stats()))
+
+# ===== METRICS & PROFILING =====
+metrics.describe('stage_seconds', 'Time spent in each stage of /result')
+metrics.describe('batch_stage_seconds', 'Time spent in each stage of /api/predict_batch')
+metrics.describe('micro_batch_seconds', 'Predict time per /api/score micro-batch')
+metrics.describe('request_seconds', 'Request latency by endpoint')
+metrics.describe('predictions_total', 'Single predictions by outcome')
+metrics.describe('validation_failures_total', 'Requests rejected for invalid input')
+metrics.describe('errors_total', 'Unexpected errors by endpoint')
+metrics.gauge('write_queue_depth', lambda: write_queue.metrics()['depth'] if write_queue else None)
+metrics.gauge('micro_batch_pending', lambda: micro_batcher.metrics()['pending'])
+metrics.gauge('micro_batch_size_avg', lambda: micro_batcher.metrics()['batch_size_avg'])
+metrics.describe('feature_psi', 'Population stability index of each feature vs the training data')
+metrics.gauge('feature_psi', drift_monitor.psi_by_feature)
+metrics.gauge('prediction_cache_entries', lambda: prediction_cache.stats()['size'])
+metrics.gauge('prediction_cache_hits', lambda: prediction_cache.stats()['hits'])
+metrics.gauge('prediction_cache_misses', lambda: prediction_cache.stats()['misses'])
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    profiler_switch.sync()
+
+@app.after_request
+def record_request(response):
+    worker_state['requests'] += 1
+    start = g.get('request_start')
+    if start is not None:
+        metrics.observe('request_seconds', time.perf_counter() - start,
+                        endpoint=request.endpoint or 'unknown')
+    return response
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route("/admin/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    """GET: top stacks merged across workers. POST {"enabled": bool, "interval_ms": n}: start/stop in every worker"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        try:
+            interval_ms = float(body.get('interval_ms', 5))
+        except (TypeError, ValueError):
+            interval_ms = 0
+        if not interval_ms > 0:
+            return jsonify({'error': 'interval_ms must be a positive number'}), 400
+        profiler_switch.set(bool(body.get('enabled')), interval_ms)
+    return jsonify(profiler_switch.report())
+
+# ===== MODEL ADMIN =====
+def admin_authorized():
+    """Admin endpoints need X-Admin-Token matching ADMIN_TOKEN (disabled when unset)"""
+    token = app.config['ADMIN_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+@app.route("/admin/models")
+def admin_models():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    models.get()
+    return jsonify(models.status())
+
+@app.route("/admin/models/reload", methods=["POST"])
+def admin_reload_model():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    models.load()
+    return jsonify(models.status())
+
+@app.route("/admin/models/promote", methods=["POST"])
+def admin_promote_model():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        models.promote(version)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(models.status())
+
+@app.route("/admin/models/shadow", methods=["POST"])
+def admin_shadow_model():
+    """Set ({"version": name}) or clear ({"version": null}) the shadow candidate"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        if version:
+            models.store.set_pointer(CANDIDATE, version)
+        else:
+            models.store.clear_pointer(CANDIDATE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    models.load()
+    return jsonify(models.status())
+
+# ===== PREDICTIONS EXPORT =====
+@app.route("/api/export")
+def api_export():
+    """Stream the predictions table as CSV, Parquet or Arrow (admin only)"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt != 'csv' and not pyarrow_available():
+        return jsonify({'error': f'{fmt} export needs the pyarrow package'}), 501
+    try:
+        query = export_query(parse_day(request.args.get('start')),
+                             parse_day(request.args.get('end'), end=True),
+                             request.args.get('outcome'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    body = export_stream(query, fmt, app.config['EXPORT_CHUNK_SIZE'])
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=predictions.{extension}'
+    })
+
+# ==================== CLI COMMANDS ====================
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recompute per-session aggregates from the predictions table"""
+    create_tables(app)
+    sessions = rebuild_session_stats()
+    print(f"✅ Rebuilt stats for {sessions} sessions")
+
+@app.cli.command("publish-model")
+@click.argument("version")
+@click.option("--weights", default=MODEL_PATH, show_default=True, help="Weights file to publish")
+@click.option("--live", "target", flag_value="live", help="Serve it immediately")
+@click.option("--shadow", "target", flag_value="shadow", help="Score it in shadow mode")
+def publish_model_command(version, weights, target):
+    """Copy a weights file into model/versions as VERSION"""
+    store = models.store
+    first_version = not store.versions()
+    try:
+        store.publish(weights, version)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(str(e))
+    if target == "live" or first_version:
+        store.set_pointer(LIVE, version)
+    elif target == "shadow":
+        store.set_pointer(CANDIDATE, version)
+    print(f"✅ Published model version {version} (live: {store.pointer(LIVE)}, "
+          f"candidate: {store.pointer(CANDIDATE)})")
+
+@app.cli.command("export-predictions")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="csv", show_default=True)
+@click.option("--start", help="First day to include (YYYY-MM-DD)")
+@click.option("--end", help="Last day to include (YYYY-MM-DD)")
+@click.option("--outcome", type=click.Choice(["approved", "rejected"]))
+@click.option("--out", "out_path", required=True, help="Output file")
+def export_predictions_command(fmt, start, end, outcome, out_path):
+    """Stream the predictions table to a file in fixed-size chunks"""
+    try:
+        start_at = parse_day(start)
+    except ValueError:
+        raise click.BadParameter(f"{start!r} is not a YYYY-MM-DD date", param_hint="--start")
+    try:
+        end_at = parse_day(end, end=True)
+    except ValueError:
+        raise click.BadParameter(f"{end!r} is not a YYYY-MM-DD date", param_hint="--end")
+    query = export_query(start_at, end_at, outcome)
+    mode = 'w' if fmt == 'csv' else 'wb'
+    with open(out_path, mode, **({'newline': ''} if fmt == 'csv' else {})) as f:
+        for chunk in export_stream(query, fmt, app.config['EXPORT_CHUNK_SIZE']):
+            f.write(chunk)
+    print(f"✅ Exported predictions to {out_path}")
+
+@app.cli.command("retention")
+@click.option("--ttl-days", type=float, help="Expire sessions idle this long (default RETENTION_TTL_DAYS)")
+@click.option("--no-archive", is_flag=True, help="Delete expired rows without archiving them")
+@click.option("--enable-incremental-vacuum", "convert", is_flag=True,
+              help="First run a one-off full VACUUM that switches an existing SQLite file to incremental vacuum")
+def retention_command(ttl_days, no_archive, convert):
+    """Archive and delete expired sessions, then reclaim the freed space"""
+    create_tables(app)
+    if convert and db.engine.dialect.name == 'sqlite':
+        if enable_incremental_vacuum():
+            print("✅ Switched the database to auto_vacuum=INCREMENTAL")
+    archive_dir = None if no_archive else app.config['RETENTION_ARCHIVE_DIR']
+    report = run_retention(
+        ttl_days if ttl_days is not None else app.config['RETENTION_TTL_DAYS'],
+        archive_dir=archive_dir,
+        chunk_size=app.config['RETENTION_CHUNK_SIZE'],
+        pause=app.config['RETENTION_PAUSE_MS'] / 1000
+    )
+    append_report(os.path.join(app.instance_path, 'retention_runs.jsonl'), report)
+    print(json.dumps(report, indent=2))
+    if report['vacuum'] == 'unavailable' and db.engine.dialect.name == 'sqlite':
+        print("ℹ️  Space was freed inside the file but not returned to the OS; "
+              "run once with --enable-incremental-vacuum")
+
 # ==================== RUN APP ====================
 if __name__ == "__main__":
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Shared helpers for the benchmark scripts: app setup, synthetic data, result files."""
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+from features import SCHEMA
+
+
+def load_app(db_path=None):
+    """Import the app against a throwaway SQLite file with logging off"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='loan-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('LOG_LEVEL', 'OFF')
+    import app
+    app.warm_up()
+    return app
+
+
+def applicants(n, seed=42):
+    """n form dicts sampled (with replacement) from complete rows of dataset.csv"""
+    with open(os.path.join(ROOT, 'dataset.csv'), newline='') as f:
+        rows = [r for r in csv.DictReader(f) if all(r.values())]
+    pool = []
+    for r in rows:
+        values, _ = SCHEMA.validate_one(r)
+        pool.append({k: str(v) for k, v in values.items()})
+    rng = random.Random(seed)
+    return [dict(rng.choice(pool)) for _ in range(n)]
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """{'p50': ..} in milliseconds from a list of seconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{p}': None for p in points}
+    return {f'p{p}': round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 3)
+            for p in points}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(kind, results, scenario=None):
+    """Write results to benchmarks/results/<kind>-<time>-<rev>.json and return the path.
+
+    scenario holds the run parameters (mix, concurrency, ...) that decide
+    which earlier runs the results can be compared with.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    rev = git_revision()
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(RESULTS_DIR, f'{kind}-{stamp}-{rev}.json')
+    with open(path, 'w') as f:
+        json.dump({'kind': kind, 'revision': rev, 'time': stamp, 'scenario': scenario or {},
+                   'results': results}, f, indent=2)
+    return path
+
+
+def previous_results(kind, scenario=None, exclude=None):
+    """Most recent saved results of this kind and scenario (other than `exclude`), or None"""
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    files = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith(kind + '-') and f.endswith('.json'))
+    for name in reversed(files):
+        path = os.path.join(RESULTS_DIR, name)
+        if path == exclude:
+            continue
+        with open(path) as f:
+            previous = json.load(f)
+        if previous.get('scenario', {}) == (scenario or {}):
+            return previous
+    return None
+
+
+def print_comparison(current, previous, metrics):
+    """Print each benchmark's metrics next to the previous run's"""
+    if previous is None:
+        return
+    print(f"\nvs {previous['revision']} ({previous['time']}, same scenario):")
+    for name, values in current.items():
+        for metric in metrics:
+            old = previous['results'].get(name, {}).get(metric)
+            new = values.get(metric)
+            if old and new:
+                print(f"  {name + ' ' + metric:<32}{old:>12.3f} -> {new:>12.3f}  ({(new - old) / old * 100:+.1f}%)")
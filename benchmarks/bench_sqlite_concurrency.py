@@ -0,0 +1,94 @@
+"""Concurrent write throughput on SQLite for each storage profile.
+
+Starts N worker processes (like N gunicorn workers) that each insert
+prediction rows with one commit per row, as /result does, and reports
+rows/sec and "database is locked" failures per profile.
+
+    python benchmarks/bench_sqlite_concurrency.py --workers 8 --rows 300
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+from database import Prediction
+from storage import SQLITE_PROFILES, engine_options, apply_sqlite_pragmas
+
+ROW = dict(
+    Gender=1, Married=1, Dependents=0, Education=1, Self_Employed=0,
+    ApplicantIncome=5000.0, CoapplicantIncome=0.0, LoanAmount=128.0,
+    Loan_Amount_Term=360.0, Credit_History=1.0, Property_Area=2,
+    prediction_result=1, confidence=85.6, total_income=5000.0, loan_to_income_ratio=0.03
+)
+
+
+def make_engine(uri, profile):
+    engine = create_engine(uri, **engine_options(uri, profile))
+    event.listen(engine, 'connect', lambda conn, rec: apply_sqlite_pragmas(conn, profile))
+    return engine
+
+
+def worker(uri, profile, rows, start_event, results):
+    engine = make_engine(uri, profile)
+    insert = Prediction.__table__.insert()
+    ok = locked = 0
+    start_event.wait()
+    for i in range(rows):
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert, dict(ROW, session_id=f"bench-{os.getpid()}", timestamp=datetime.utcnow()))
+            ok += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    results.put((ok, locked))
+
+
+def run(profile, workers, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = make_engine(uri, profile)
+        Prediction.__table__.create(engine)
+        engine.dispose()
+
+        start_event, results = mp.Event(), mp.Queue()
+        procs = [mp.Process(target=worker, args=(uri, profile, rows, start_event, results))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        t0 = time.perf_counter()
+        start_event.set()
+        totals = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - t0
+        for p in procs:
+            p.join()
+
+    ok = sum(t[0] for t in totals)
+    locked = sum(t[1] for t in totals)
+    return ok, locked, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=300, help='inserts per worker')
+    parser.add_argument('--profiles', nargs='+', default=sorted(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<10}{'workers':>8}{'rows':>8}{'locked':>8}{'seconds':>9}{'rows/sec':>10}")
+    for profile in args.profiles:
+        ok, locked, elapsed = run(profile, args.workers, args.rows)
+        print(f"{profile:<10}{args.workers:>8}{ok:>8}{locked:>8}{elapsed:>9.2f}{ok / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Cold-start cost of the web app: import time and warm-up time.
+
+Each run is a fresh interpreter (like a new gunicorn worker or container).
+Reports the median over --runs and the slowest imports from -X importtime.
+With --budget-ms, exits non-zero when the median import time exceeds the
+budget, so CI can track startup regressions.
+
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.warm_up()
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'warm_up_ms': (t2 - t1) * 1000}))
+"""
+
+
+def run_probe(env):
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(env, top=10):
+    """(cumulative_us, module) for the slowest imports when loading app"""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    # Keep benchmark runs away from the real database
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    samples = [run_probe(env) for _ in range(args.runs)]
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    warm_ms = statistics.median(s['warm_up_ms'] for s in samples)
+
+    print(f"import app : {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"warm_up()  : {warm_ms:8.1f} ms (median of {args.runs})")
+    print("slowest imports (cumulative):")
+    for cumulative, module in slowest_imports(env):
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"❌ Import time {import_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
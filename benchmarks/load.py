@@ -0,0 +1,158 @@
+"""End-to-end load generator for /result, /api/score, /history and /api/stats.
+
+Drives the app at a fixed concurrency with synthetic applicants sampled
+from dataset.csv, either in-process through Flask's test client or against
+a running server over HTTP. Reports throughput and latency percentiles per
+endpoint, saves them under benchmarks/results/ and compares with the
+previous run.
+
+    python benchmarks/load.py --concurrency 8 --requests 4000
+    python benchmarks/load.py --url http://127.0.0.1:5000 --concurrency 32
+    python benchmarks/load.py --mix score=1 --concurrency 64
+"""
+import argparse
+import http.cookiejar
+import itertools
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from _common import applicants, load_app, percentiles, previous_results, print_comparison, save_results
+
+ENDPOINTS = {
+    'result': ('POST', '/result'),
+    'score': ('JSON', '/api/score'),
+    'history': ('GET', '/history'),
+    'stats': ('GET', '/api/stats'),
+}
+
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.client = app.app.test_client()
+
+    def request(self, method, path, form=None):
+        if method == 'JSON':
+            return self.client.post(path, json=form).status_code
+        response = self.client.open(path, method=method, data=form)
+        return response.status_code
+
+
+class HttpDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, form=None):
+        headers = {}
+        if method == 'JSON':
+            method, body = 'POST', json.dumps(form).encode()
+            headers['Content-Type'] = 'application/json'
+        else:
+            body = urllib.parse.urlencode(form).encode() if form else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def parse_mix(text):
+    """'result=8,history=1,stats=1' -> repeating list of endpoint names"""
+    mix = []
+    for part in text.split(','):
+        name, weight = part.split('=')
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix += [name] * int(weight)
+    return mix
+
+
+def run(make_driver, forms, mix, concurrency, total):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        driver = make_driver()
+        local = defaultdict(list)
+        local_errors = defaultdict(int)
+        while True:
+            i = next(counter)
+            if i >= total:
+                break
+            name = mix[i % len(mix)]
+            method, path = ENDPOINTS[name]
+            start = time.perf_counter()
+            status = driver.request(method, path, forms[i % len(forms)] if method != 'GET' else None)
+            local[name].append(time.perf_counter() - start)
+            if status >= 400:
+                local_errors[name] += 1
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+            for name, count in local_errors.items():
+                errors[name] += count
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--mix', default='result=8,history=1,stats=1')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    forms = applicants(min(args.requests, 5000), seed=args.seed)
+    mix = parse_mix(args.mix)
+    if args.url:
+        make_driver = lambda: HttpDriver(args.url)
+    else:
+        app = load_app()
+        make_driver = lambda: TestClientDriver(app)
+
+    # Warm-up pass so the first measured requests are not cold
+    run(make_driver, forms, mix, 1, min(50, args.requests))
+    latencies, errors, elapsed = run(make_driver, forms, mix, args.concurrency, args.requests)
+
+    results = {}
+    all_samples = []
+    for name, samples in latencies.items():
+        all_samples += samples
+        results[name] = dict(requests=len(samples), errors=errors[name], **percentiles(samples))
+    results['total'] = dict(requests=len(all_samples), errors=sum(errors.values()),
+                            rps=round(len(all_samples) / elapsed, 1), **percentiles(all_samples))
+
+    print(f"mode={'http ' + args.url if args.url else 'test-client'} concurrency={args.concurrency} "
+          f"elapsed={elapsed:.2f}s")
+    print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['requests']:>10}{r['errors']:>8}{r['p50']:>10.2f}{r['p90']:>10.2f}{r['p99']:>10.2f}")
+    print(f"throughput: {results['total']['rps']} req/s")
+
+    # Only runs with the same traffic shape are comparable
+    scenario = {'mode': 'http' if args.url else 'test-client', 'url': args.url,
+                'mix': args.mix, 'concurrency': args.concurrency}
+    path = save_results('load', results, scenario)
+    print_comparison(results, previous_results('load', scenario, exclude=path), ('p99', 'rps'))
+    print(f"\nSaved {path}")
+
+
+if __name__ == '__main__':
+    main()
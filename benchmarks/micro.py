@@ -0,0 +1,66 @@
+"""Micro-benchmarks for the pieces of a /result request.
+
+Times form parsing, feature-array construction, single-row and batch
+model.predict, calculate_emi and a one-row database insert, saves the
+results under benchmarks/results/ and compares with the previous run.
+
+    python benchmarks/micro.py --number 20000
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from _common import applicants, load_app, previous_results, print_comparison, save_results
+
+
+def bench(fn, number, repeat=5):
+    """Best-of-repeat time per call, in microseconds"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='calls per timing repeat')
+    args = parser.parse_args()
+
+    app = load_app()
+    model = app.models.get()
+    forms = applicants(1000)
+    form = forms[0]
+    form_data, features = app.parse_form(form)
+    X = np.array([app.parse_form(f)[1] for f in forms], dtype=np.float64)
+
+    row = {col: form_data[col] for col in app.FEATURE_COLUMNS}
+    row.update(session_id='bench', prediction_result=1, confidence=80.0,
+               total_income=1.0, loan_to_income_ratio=1.0, model_version=model.version)
+
+    def insert_one():
+        with app.app.app_context():
+            app.persist_predictions([dict(row)])
+
+    n = args.number
+    results = {
+        'parse_form': bench(lambda: app.parse_form(form), n),
+        'feature_array': bench(lambda: np.array([features], dtype=np.float64), n),
+        'predict_1_row': bench(lambda: model.predict([features]), n),
+        'confidence_1_row': bench(lambda: model.confidence([features]), n),
+        'predict_1000_rows': bench(lambda: model.predict(X), max(1, n // 100)),
+        'explain_1_row': bench(lambda: model.explain([features], top=5), n),
+        'explain_1000_rows': bench(lambda: model.explain(X, top=5), max(1, n // 100)),
+        'calculate_emi': bench(lambda: app.calculate_emi(float(form['LoanAmount']), 360), n),
+        'db_insert_1_row': bench(insert_one, max(1, n // 100)),
+    }
+    results = {name: {'us_per_call': round(us, 3)} for name, us in results.items()}
+
+    print(f"{'benchmark':<28}{'us/call':>12}")
+    for name, values in results.items():
+        print(f"{name:<28}{values['us_per_call']:>12.3f}")
+
+    path = save_results('micro', results)
+    print_comparison(results, previous_results('micro', exclude=path), ('us_per_call',))
+    print(f"\nSaved {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+import logging
+
+logger = logging.getLogger('loan.database')
+
+db = SQLAlchemy()
+
+# Database Table for storing predictions
+class Prediction(db.Model):
+    # History is always read per session, newest first
+    __table_args__ = (
+        db.Index('ix_prediction_session_timestamp', 'session_id', 'timestamp', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(100), nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Form data
+    Gender = db.Column(db.Integer)
+    Married = db.Column(db.Integer)
+    Dependents = db.Column(db.Integer)
+    Education = db.Column(db.Integer)
+    Self_Employed = db.Column(db.Integer)
+    ApplicantIncome = db.Column(db.Float)
+    CoapplicantIncome = db.Column(db.Float)
+    LoanAmount = db.Column(db.Float)
+    Loan_Amount_Term = db.Column(db.Float)
+    Credit_History = db.Column(db.Float)
+    Property_Area = db.Column(db.Integer)
+    
+    # Results
+    prediction_result = db.Column(db.Integer)
+    confidence = db.Column(db.Float)
+    total_income = db.Column(db.Float)
+    loan_to_income_ratio = db.Column(db.Float)
+    model_version = db.Column(db.String(64))
+
+# Per-session aggregates, kept in step with the Prediction table so that
+# /api/stats is a primary-key lookup instead of a scan of the history
+class SessionStats(db.Model):
+    session_id = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    approved = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    # Newest prediction in the session; retention expires sessions by it
+    last_seen = db.Column(db.DateTime, index=True)
+
+    def to_dict(self):
+        total = self.total or 0
+        approved = self.approved or 0
+        return {
+            'total': total,
+            'approved': approved,
+            'rejected': total - approved,
+            'approval_rate': round((approved/total*100), 1) if total > 0 else 0,
+            'avg_confidence': round(self.confidence_sum/total, 1) if total > 0 else 0
+        }
+
+# INSERT ... ON CONFLICT DO UPDATE, per dialect (SQLite >= 3.24, PostgreSQL)
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def update_session_stats(session_id, total, approved, confidence_sum, last_seen=None):
+    """Add (or, with negative counts, remove) predictions in a session's aggregates.
+
+    Additions are a single upsert, so concurrent first writes to a session
+    cannot both insert. Removals only update an existing row: a negative
+    delta never creates one. The caller commits, in the same transaction as
+    the Prediction rows.
+    """
+    table = SessionStats.__table__
+    values = dict(total=table.c.total + total,
+                  approved=table.c.approved + approved,
+                  confidence_sum=table.c.confidence_sum + confidence_sum)
+    if last_seen is not None:
+        values['last_seen'] = last_seen
+    if total < 0:
+        db.session.execute(table.update().where(table.c.session_id == session_id).values(**values))
+        return
+
+    row = dict(session_id=session_id, total=total, approved=approved,
+               confidence_sum=confidence_sum, last_seen=last_seen)
+    insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        db.session.execute(insert(table).values(**row).on_conflict_do_update(
+            index_elements=[table.c.session_id], set_=values))
+        return
+
+    # Other databases: update, then insert if the session had no row yet
+    updated = db.session.execute(
+        table.update().where(table.c.session_id == session_id).values(**values)
+    ).rowcount
+    if not updated:
+        db.session.execute(table.insert().values(**row))
+
+def persist_predictions(rows):
+    """Bulk insert prediction row dicts and update their sessions' aggregates in one commit"""
+    try:
+        db.session.execute(db.insert(Prediction), rows)
+        per_session = {}
+        for row in rows:
+            agg = per_session.setdefault(row['session_id'], [0, 0, 0.0, None])
+            agg[0] += 1
+            agg[1] += row['prediction_result'] == 1
+            agg[2] += row['confidence'] or 0.0
+            timestamp = row.get('timestamp')
+            if timestamp is not None and (agg[3] is None or timestamp > agg[3]):
+                agg[3] = timestamp
+        for session_id, (total, approved, confidence_sum, last_seen) in per_session.items():
+            update_session_stats(session_id, total, approved, confidence_sum,
+                                 last_seen or datetime.utcnow())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def rebuild_session_stats():
+    """Recompute every session's aggregates from the raw Prediction table"""
+    db.session.execute(SessionStats.__table__.delete())
+    db.session.execute(SessionStats.__table__.insert().from_select(
+        ['session_id', 'total', 'approved', 'confidence_sum', 'last_seen'],
+        db.select(
+            Prediction.session_id,
+            db.func.count(Prediction.id),
+            db.func.coalesce(db.func.sum(db.case((Prediction.prediction_result == 1, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(Prediction.confidence), 0.0),
+            db.func.max(Prediction.timestamp)
+        ).group_by(Prediction.session_id)
+    ))
+    db.session.commit()
+    return db.session.query(db.func.count(SessionStats.session_id)).scalar()
+
+# Columns rendered by history.html (no need to hydrate full ORM objects)
+HISTORY_COLUMNS = (
+    Prediction.id, Prediction.timestamp, Prediction.prediction_result,
+    Prediction.LoanAmount, Prediction.ApplicantIncome, Prediction.CoapplicantIncome,
+    Prediction.total_income, Prediction.confidence,
+    Prediction.Gender, Prediction.Married, Prediction.Dependents
+)
+
+def encode_cursor(row):
+    """Opaque keyset cursor pointing just after a history row"""
+    return f"{row.timestamp.isoformat()}_{row.id}"
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    timestamp, row_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+def fetch_history_page(session_id, cursor=None, limit=20):
+    """One page of a session's history (newest first) and the cursor for the next page.
+
+    Keyset pagination on (timestamp, id) walks ix_prediction_session_timestamp,
+    so each page costs the same however long the history is.
+    """
+    query = db.select(*HISTORY_COLUMNS).where(Prediction.session_id == session_id)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.where(db.or_(
+            Prediction.timestamp < timestamp,
+            db.and_(Prediction.timestamp == timestamp, Prediction.id < row_id)
+        ))
+    query = query.order_by(Prediction.timestamp.desc(), Prediction.id.desc()).limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+# (model, column, DDL type) for columns added after the first release
+ADDED_COLUMNS = (
+    (Prediction, 'model_version', 'VARCHAR(64)'),
+    (SessionStats, 'last_seen', 'DATETIME'),
+)
+
+def init_db(app):
+    """Bind the database to the app (no I/O; see create_tables)"""
+    db.init_app(app)
+
+def create_tables(app):
+    """Create missing tables and indexes and backfill the stats aggregates"""
+    with app.app_context():
+        db.create_all()
+        # Columns added after the table was first created
+        added = set()
+        for model, column, ddl in ADDED_COLUMNS:
+            existing = {c['name'] for c in inspect(db.engine).get_columns(model.__tablename__)}
+            if column not in existing:
+                db.session.execute(db.text(f"ALTER TABLE {model.__tablename__} ADD COLUMN {column} {ddl}"))
+                db.session.commit()
+                added.add(column)
+        # create_all() skips indexes on tables that already exist
+        for model in (Prediction, SessionStats):
+            for index in model.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+        # Aggregates table (or its last_seen column) added to an existing
+        # database: backfill it once
+        has_predictions = db.session.query(Prediction.id).first() is not None
+        has_stats = db.session.query(SessionStats.session_id).first() is not None
+        if has_predictions and (not has_stats or 'last_seen' in added):
+            rebuild_session_stats()
+        logger.info("event=database_ready")
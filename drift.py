@@ -0,0 +1,246 @@
+import bisect
+import threading
+
+import numpy as np
+
+from features import SCHEMA
+
+PSI_EPSILON = 1e-4
+# Conventional PSI bands: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 drift
+PSI_MODERATE = 0.1
+PSI_DRIFT = 0.25
+
+
+class FeatureSketch:
+    """Fixed-size streaming summary of the model inputs.
+
+    Per feature: a histogram over fixed bins (quantile edges for numbers, one
+    bucket per category code plus 'other') and running moments (weighted
+    count, sums of x - shift and its square, min, max). update() costs O(1)
+    per value; decay() scales every count down so old traffic fades out.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.columns = [s['name'] for s in spec]
+        self._bounds = [s['edges'] if s['kind'] == 'numeric' else s['codes'] for s in spec]
+        self._arrays = [np.asarray(b, dtype=np.float64) for b in self._bounds]
+        self.reset()
+
+    @classmethod
+    def for_reference(cls, X, bins=10, columns=None):
+        """Sketch whose numeric bins are the deciles (or `bins` quantiles) of reference rows X"""
+        X = np.asarray(X, dtype=np.float64)
+        spec = []
+        for j, name in enumerate(columns or SCHEMA.columns):
+            feature = SCHEMA[name]
+            if feature.categories:
+                spec.append({'name': name, 'kind': 'category',
+                             'codes': sorted(set(feature.categories.values()))})
+            else:
+                edges = np.unique(np.round(np.quantile(X[:, j], np.linspace(0, 1, bins + 1)[1:-1]), 4))
+                spec.append({'name': name, 'kind': 'numeric', 'edges': edges.tolist(),
+                             'shift': float(X[:, j].mean())})
+        return cls(spec)
+
+    def reset(self):
+        self.counts = [np.zeros(len(b) + 1) for b in self._bounds]
+        self.n = 0.0
+        self.sums = np.zeros(len(self.spec))
+        self.squares = np.zeros(len(self.spec))
+        self.minimum = np.full(len(self.spec), np.inf)
+        self.maximum = np.full(len(self.spec), -np.inf)
+        self._shift = np.array([s.get('shift', 0.0) for s in self.spec])
+
+    def update(self, X):
+        """Add a batch of rows (n x features)"""
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        for j, (s, bounds) in enumerate(zip(self.spec, self._arrays)):
+            column = X[:, j]
+            if s['kind'] == 'numeric':
+                index = np.searchsorted(bounds, column, side='right')
+            else:
+                index = np.searchsorted(bounds, column)
+                matched = bounds[np.minimum(index, len(bounds) - 1)] == column
+                index[~matched] = len(bounds)
+            self.counts[j] += np.bincount(index, minlength=len(bounds) + 1)
+        centered = X - self._shift
+        self.n += len(X)
+        self.sums += centered.sum(axis=0)
+        self.squares += (centered ** 2).sum(axis=0)
+        self.minimum = np.minimum(self.minimum, X.min(axis=0))
+        self.maximum = np.maximum(self.maximum, X.max(axis=0))
+
+    def update_row(self, row):
+        """Add one row; plain-Python bisects, cheaper than update() for a single row"""
+        for j, (s, bounds) in enumerate(zip(self.spec, self._bounds)):
+            x = row[j]
+            if s['kind'] == 'numeric':
+                self.counts[j][bisect.bisect_right(bounds, x)] += 1
+            else:
+                i = bisect.bisect_left(bounds, x)
+                self.counts[j][i if i < len(bounds) and bounds[i] == x else len(bounds)] += 1
+        row = np.asarray(row, dtype=np.float64)
+        centered = row - self._shift
+        self.n += 1
+        self.sums += centered
+        self.squares += centered ** 2
+        np.minimum(self.minimum, row, out=self.minimum)
+        np.maximum(self.maximum, row, out=self.maximum)
+
+    def decay(self, factor=0.5):
+        """Scale all counts and sums by factor (min/max are kept)"""
+        for counts in self.counts:
+            counts *= factor
+        self.n *= factor
+        self.sums *= factor
+        self.squares *= factor
+
+    def moments(self):
+        """(mean, std) arrays; NaN before any rows"""
+        if not self.n:
+            nan = np.full(len(self.spec), np.nan)
+            return nan, nan
+        mean = self.sums / self.n
+        variance = np.maximum(self.squares / self.n - mean ** 2, 0.0)
+        return mean + self._shift, np.sqrt(variance)
+
+    def to_dict(self):
+        """JSON-serialisable sketch (used as the training baseline)"""
+        mean, std = self.moments()
+        return {
+            'rows': self.n,
+            'features': [
+                dict(s, counts=counts.tolist(), mean=float(m), std=float(sd),
+                     min=float(lo), max=float(hi))
+                for s, counts, m, sd, lo, hi in zip(self.spec, self.counts, mean, std,
+                                                    self.minimum, self.maximum)
+            ]
+        }
+
+
+def psi(expected, actual):
+    """Population stability index between two histograms over the same bins"""
+    p = np.maximum(expected / max(expected.sum(), 1e-12), PSI_EPSILON)
+    q = np.maximum(actual / max(actual.sum(), 1e-12), PSI_EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(expected, actual):
+    """Kolmogorov-Smirnov statistic on binned data: largest gap between the two CDFs"""
+    p = np.cumsum(expected) / max(expected.sum(), 1e-12)
+    q = np.cumsum(actual) / max(actual.sum(), 1e-12)
+    return float(np.max(np.abs(p - q)))
+
+
+def status(score):
+    if score >= PSI_DRIFT:
+        return 'drift'
+    if score >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """Live sketch of scored applicants compared against the model's training baseline.
+
+    observe()/observe_row() are called on every scored row. Every `window`
+    rows the live counts are halved, so scores follow roughly the last
+    couple of windows of traffic. report() is a few hundred floating-point
+    operations, cheap enough to serve on every request.
+    """
+
+    def __init__(self, window=10000, min_rows=100):
+        self.window = window
+        self.min_rows = min_rows
+        self._lock = threading.Lock()
+        self.baseline = None
+        self.live = None
+        self.version = None
+        self._since_decay = 0
+
+    def set_baseline(self, baseline, version=None):
+        """Start a fresh live sketch against a baseline dict (None disables monitoring)"""
+        with self._lock:
+            self.version = version
+            if not baseline:
+                self.baseline = self.live = None
+                return
+            spec = [{k: f[k] for k in ('name', 'kind', 'edges', 'codes', 'shift') if k in f}
+                    for f in baseline['features']]
+            self.baseline = baseline
+            self._expected = [np.asarray(f['counts'], dtype=np.float64) for f in baseline['features']]
+            self.live = FeatureSketch(spec)
+            self._since_decay = 0
+
+    def after_fork(self):
+        """Fresh lock and empty live sketch in a forked worker"""
+        self._lock = threading.Lock()
+        if self.live is not None:
+            self.live.reset()
+        self._since_decay = 0
+
+    def observe(self, X):
+        if self.live is None:
+            return
+        with self._lock:
+            self.live.update(X)
+            self._maybe_decay(len(X))
+
+    def observe_row(self, row):
+        if self.live is None:
+            return
+        with self._lock:
+            self.live.update_row(row)
+            self._maybe_decay(1)
+
+    def _maybe_decay(self, rows):
+        self._since_decay += rows
+        if self._since_decay >= self.window:
+            self.live.decay(0.5)
+            self._since_decay = 0
+
+    def report(self):
+        """Per-feature PSI, KS and mean shift (in baseline standard deviations)"""
+        if self.live is None:
+            return {'enabled': False}
+        with self._lock:
+            actual = [c.copy() for c in self.live.counts]
+            rows = self.live.n
+            mean, std = self.live.moments()
+
+        features = {}
+        for j, base in enumerate(self.baseline['features']):
+            entry = {'kind': base['kind'], 'baseline_mean': round(base['mean'], 4),
+                     'live_mean': None if np.isnan(mean[j]) else round(float(mean[j]), 4)}
+            if rows >= self.min_rows:
+                entry['psi'] = round(psi(self._expected[j], actual[j]), 4)
+                entry['status'] = status(entry['psi'])
+                if base['kind'] == 'numeric':
+                    entry['ks'] = round(ks(self._expected[j], actual[j]), 4)
+                    if base['std'] > 0:
+                        entry['mean_shift'] = round(float((mean[j] - base['mean']) / base['std']), 3)
+            features[base['name']] = entry
+
+        scored = [f['psi'] for f in features.values() if 'psi' in f]
+        worst = max(scored) if scored else None
+        return {
+            'enabled': True,
+            'model_version': self.version,
+            'live_rows': round(rows, 1),
+            'baseline_rows': self.baseline['rows'],
+            'min_rows': self.min_rows,
+            'max_psi': worst,
+            'status': status(worst) if worst is not None else 'insufficient_data',
+            'features': features,
+        }
+
+    def psi_by_feature(self):
+        """{(('feature', name),): psi} for the Prometheus gauge; None when not scored"""
+        report = self.report()
+        if not report.get('enabled'):
+            return None
+        values = {(('feature', name),): f['psi'] for name, f in report['features'].items() if 'psi' in f}
+        return values or None
@@ -0,0 +1,139 @@
+import csv
+import importlib.util
+import io
+from datetime import datetime, timedelta
+
+from database import db, Prediction
+
+EXPORT_COLUMNS = [c.name for c in Prediction.__table__.columns]
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def pyarrow_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def parse_day(value, end=False):
+    """YYYY-MM-DD (or full ISO timestamp) to datetime; a bare end date includes that whole day"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def export_query(start=None, end=None, outcome=None):
+    """SELECT of all prediction columns filtered by [start, end) and outcome"""
+    query = db.select(*Prediction.__table__.columns).order_by(Prediction.id)
+    if start is not None:
+        query = query.where(Prediction.timestamp >= start)
+    if end is not None:
+        query = query.where(Prediction.timestamp < end)
+    if outcome is not None:
+        if outcome not in ('approved', 'rejected'):
+            raise ValueError("outcome must be 'approved' or 'rejected'")
+        query = query.where(Prediction.prediction_result == (1 if outcome == 'approved' else 0))
+    return query
+
+
+def iter_chunks(query, chunk_size=5000):
+    """Yield lists of row tuples using a server-side cursor (stream_results)"""
+    with db.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions(chunk_size):
+            yield partition
+
+
+def csv_stream(query, chunk_size=5000):
+    """Yield CSV text one chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in iter_chunks(query, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain.
+
+    tell() reports the total bytes written so Parquet footer offsets stay
+    correct even though the buffer is emptied after every row group.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def _arrow_schema(pa):
+    types = {
+        db.Integer: pa.int64(), db.Float: pa.float64(),
+        db.String: pa.string(), db.DateTime: pa.timestamp('us'),
+    }
+    fields = []
+    for column in Prediction.__table__.columns:
+        arrow_type = next(t for sa_type, t in types.items() if isinstance(column.type, sa_type))
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def arrow_stream(query, fmt='parquet', chunk_size=5000):
+    """Yield Parquet (one row group per chunk) or Arrow IPC stream bytes.
+
+    Needs the optional pyarrow package; raises ImportError without it.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _ByteSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    for rows in iter_chunks(query, chunk_size):
+        columns = list(zip(*rows))
+        batch = pa.record_batch(
+            [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+        )
+        if fmt == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_stream(query, fmt='csv', chunk_size=5000):
+    """Generator of the export body in the requested format"""
+    if fmt == 'csv':
+        return csv_stream(query, chunk_size)
+    if fmt in ('parquet', 'arrow'):
+        return arrow_stream(query, fmt, chunk_size)
+    raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
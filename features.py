@@ -0,0 +1,264 @@
+import math
+
+import numpy as np
+
+TARGET = 'Loan_Status'
+TARGET_MAP = {'N': 0, 'Y': 1}
+
+
+class Feature:
+    """One model input.
+
+    categories maps accepted labels to integer codes (codes themselves are
+    accepted too); numeric features are range-checked against
+    [minimum, maximum]. dtype is how the value is stored ('int' or
+    'float'). default fills a missing value; None makes the field required.
+    """
+
+    def __init__(self, name, label, dtype='float', categories=None,
+                 minimum=None, maximum=None, default=None):
+        self.name = name
+        self.label = label
+        self.dtype = dtype
+        self.categories = categories
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self._lookup = self._compile_lookup() if categories else None
+        self._codes = np.array(sorted(set(categories.values())), dtype=np.float64) if categories else None
+
+    def _compile_lookup(self):
+        """Single dict from every accepted raw value (label, code, code as text) to its code"""
+        lookup = {}
+        for code in set(self.categories.values()):
+            lookup[code] = lookup[float(code)] = code
+            lookup[str(code)] = lookup[f"{float(code)}"] = code
+        lookup.update(self.categories)
+        return lookup
+
+    def encode(self, value):
+        """Code or float for one raw value, NaN when missing or invalid"""
+        if _is_missing(value):
+            return np.nan if self.default is None else float(self.default)
+        if self._lookup is not None:
+            try:
+                return float(self._lookup.get(value, np.nan))
+            except TypeError:
+                return np.nan
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return np.nan
+        if not math.isfinite(number) or self._out_of_range(number):
+            return np.nan
+        return number
+
+    def _out_of_range(self, number):
+        return ((self.minimum is not None and number < self.minimum) or
+                (self.maximum is not None and number > self.maximum))
+
+    def encode_column(self, values):
+        """encode() over a whole column (list or NumPy array); returns float64 with NaN where invalid"""
+        numeric_array = isinstance(values, np.ndarray) and values.dtype.kind in 'biuf'
+        missing = None
+        if self._lookup is not None:
+            try:
+                # Codes (numbers or numeric text) convert in one go; labels raise
+                column = values.astype(np.float64) if numeric_array else np.array(values, dtype=np.float64)
+                if column.ndim != 1:
+                    raise ValueError("nested values")
+                missing = np.isnan(column)
+                column[~np.isin(column, self._codes)] = np.nan
+            except (TypeError, ValueError):
+                try:
+                    column = np.array([self._lookup.get(v, np.nan) for v in values], dtype=np.float64)
+                except TypeError:  # unhashable cell somewhere
+                    column = np.array([self.encode(v) for v in values], dtype=np.float64)
+        else:
+            try:
+                column = np.array(values, dtype=np.float64)
+                if column.ndim != 1:
+                    # Nested cells ([1], [[1]]) are invalid, not numbers to broadcast
+                    raise ValueError("nested values")
+                # Only None/NaN convert to NaN here, so this is the missing mask
+                missing = np.isnan(column) if self.default is not None else None
+            except (TypeError, ValueError):
+                column = np.array([_to_float(v) for v in values], dtype=np.float64)
+            with np.errstate(invalid='ignore'):
+                bad = ~np.isfinite(column)
+                if self.minimum is not None:
+                    bad |= column < self.minimum
+                if self.maximum is not None:
+                    bad |= column > self.maximum
+            column[bad] = np.nan
+
+        if self.default is not None:
+            if missing is None:
+                missing = np.array([_is_missing(v) for v in values], dtype=bool)
+            column[missing] = self.default
+        return column
+
+    def describe(self, code):
+        """Label for a stored category code (the code itself when unknown)"""
+        if self.categories:
+            for label, value in self.categories.items():
+                if value == code:
+                    return label
+        return code
+
+    def rule(self):
+        """Human-readable constraint, used in error messages"""
+        if self.categories:
+            return 'one of ' + ', '.join(f"{label} ({code})" for label, code in self.categories.items())
+        low = '' if self.minimum is None else f"{self.minimum:g}"
+        high = '' if self.maximum is None else f"{self.maximum:g}"
+        return f"a number in [{low}, {high}]"
+
+
+def _is_missing(value):
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_float(value):
+    """Convert one raw cell to float, NaN when missing or not numeric"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class FeatureSchema:
+    """Ordered collection of Features, in the column order the model expects"""
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.columns = [f.name for f in self.features]
+        self._by_name = {f.name: f for f in self.features}
+        # Per-feature work for validate_one, resolved once
+        self._plan = [(f, f.name, f._lookup, f.dtype == 'int') for f in self.features]
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def validate_one(self, data):
+        """Typed values and model row for one applicant mapping (form or JSON).
+
+        Returns (values dict, feature list); raises ValueError naming every
+        invalid field.
+        """
+        values, features, bad = {}, [], []
+        for feature, name, lookup, as_int in self._plan:
+            raw = data.get(name)
+            if lookup is not None and raw is not None:
+                try:
+                    value = lookup.get(raw)
+                except TypeError:
+                    value = None
+                if value is None:
+                    value = feature.encode(raw)
+            else:
+                value = feature.encode(raw)
+            if value != value:
+                bad.append(feature)
+                continue
+            value = int(value) if as_int else float(value)
+            values[name] = value
+            features.append(value)
+        if bad:
+            raise ValueError('; '.join(f"{f.name} must be {f.rule()}" for f in bad))
+        return values, features
+
+    def encode_columns(self, columns):
+        """Encode a mapping of column name -> raw values into (matrix, valid_mask, bad_cells)"""
+        n = len(next(iter(columns.values()))) if columns else 0
+        matrix = np.empty((n, len(self.features)), dtype=np.float64)
+        for j, feature in enumerate(self.features):
+            raw = columns.get(feature.name)
+            matrix[:, j] = feature.encode_column([None] * n if raw is None else raw)
+        bad_cells = np.isnan(matrix)
+        return matrix, ~bad_cells.any(axis=1), bad_cells
+
+    def encode_batch(self, records):
+        """Validate applicant dicts column-wise and return (matrix, valid_mask, errors)"""
+        columns = {name: [r.get(name) for r in records] for name in self.columns}
+        matrix, valid, bad_cells = self.encode_columns(columns)
+        errors = []
+        for i in np.flatnonzero(~valid):
+            names = [self.columns[j] for j in np.flatnonzero(bad_cells[i])]
+            errors.append({'row': int(i), 'error': 'Invalid or missing: ' + ', '.join(names)})
+        return matrix, valid, errors
+
+    def encode_frame(self, frame):
+        """Encode a pandas DataFrame of raw columns; returns (matrix, valid_mask)"""
+        columns = {}
+        for feature in self.features:
+            series = frame[feature.name]
+            if feature._lookup is not None and series.dtype.kind not in 'biuf':
+                # Map labels in pandas (hashed in C); the codes are re-checked below
+                series = series.map(feature._lookup)
+            try:
+                columns[feature.name] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            except (TypeError, ValueError):
+                columns[feature.name] = series.to_numpy(dtype=object)
+        matrix, valid, _ = self.encode_columns(columns)
+        return matrix, valid
+
+
+YES_NO = {'No': 0, 'Yes': 1}
+
+SCHEMA = FeatureSchema([
+    Feature('Gender', 'Gender', 'int', categories={'Female': 0, 'Male': 1}),
+    Feature('Married', 'Marital status', 'int', categories=YES_NO),
+    Feature('Dependents', 'Dependents', 'int', categories={'0': 0, '1': 1, '2': 2, '3+': 4}),
+    Feature('Education', 'Education', 'int', categories={'Not Graduate': 0, 'Graduate': 1}),
+    Feature('Self_Employed', 'Self employment', 'int', categories=YES_NO),
+    Feature('ApplicantIncome', 'Applicant income', minimum=0, maximum=1e8),
+    Feature('CoapplicantIncome', 'Co-applicant income', minimum=0, maximum=1e8, default=0.0),
+    Feature('LoanAmount', 'Loan amount', minimum=0, maximum=1e8),
+    Feature('Loan_Amount_Term', 'Loan term', minimum=1, maximum=600),
+    Feature('Credit_History', 'Credit history', categories={'Poor': 0, 'Good': 1}),
+    Feature('Property_Area', 'Property area', 'int', categories={'Rural': 0, 'Semiurban': 1, 'Urban': 2}),
+])
+
+# Feature order expected by the model (same as the training columns)
+FEATURE_COLUMNS = SCHEMA.columns
+FLOAT_FEATURES = [f.name for f in SCHEMA.features if f.dtype == 'float']
+FEATURE_LABELS = {f.name: f.label for f in SCHEMA.features}
+
+
+def build_feature_matrix(records):
+    """Validate applicant dicts column-wise and return (matrix, valid_mask, errors)"""
+    return SCHEMA.encode_batch(records)
+
+
+
+if __name__ == '__main__':
+    # Parity check: the batch encoder must accept and reject exactly what
+    # validate_one does, including malformed JSON cells
+    import csv
+    import os
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset.csv'), newline='') as f:
+        dataset = list(csv.DictReader(f))
+    template = next(r for r in dataset if all(r.values()))
+    batches = [dataset]
+    for value in ([1], [[1]], [], {'a': 1}, 'abc', None, '', float('nan'), float('inf'), -1, 1e9, True, '3+'):
+        for name in SCHEMA.columns:
+            bad = dict(template, **{name: value})
+            # Column shapes differ with batch make-up: one cell, all cells, mixed
+            batches += [[bad], [bad, bad], [bad, template]]
+
+    rows = mismatches = 0
+    for batch in batches:
+        matrix, valid, _ = SCHEMA.encode_batch(batch)
+        for record, row, ok in zip(batch, matrix, valid):
+            rows += 1
+            try:
+                expected = SCHEMA.validate_one(record)[1]
+            except ValueError:
+                expected = None
+            if (expected is None) != (not ok) or (ok and not np.array_equal(row, expected)):
+                mismatches += 1
+                print("mismatch:", record)
+    print(f"{len(batches)} batches, {rows} records, {mismatches} batch/single mismatches")
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,38 @@
+"""Gunicorn settings for the pre-fork production server.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_WORKERS   worker processes (default: CPU count)
+WEB_THREADS   threads per worker (default: 4)
+BIND          listen address (default: 0.0.0.0:5000)
+MAX_REQUESTS  recycle a worker after this many requests (default: 0, never)
+
+Graceful restart: `kill -HUP <master pid>` forks fresh workers and lets the
+old ones finish in-flight requests within graceful_timeout. Because the app
+is preloaded, code changes need a full restart; new model versions are
+picked up by the model registry without any restart. `kill -TTIN` / `-TTOU`
+add or remove a worker.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Import the app (model weights, templates, DB engine) once in the master;
+# forked workers share those pages copy-on-write
+preload_app = True
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    from wsgi import after_fork
+    after_fork()
+    server.log.info("worker %s ready", worker.pid)
@@ -0,0 +1,321 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _label_str(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram; one lock-protected update per observation"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Counters, histograms and scrape-time gauges rendered as Prometheus text"""
+
+    def __init__(self, prefix='loan_'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the with-block into histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name, fn):
+        """Register fn() -> number or {labels-tuple: number}, evaluated at scrape time"""
+        self._gauges[name] = fn
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+
+        for name in sorted({k[0] for k in counters}):
+            self._header(lines, name, 'counter')
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{self.prefix}{name}{_label_str(labels)} {value}")
+
+        for name in sorted({k[0] for k in histograms}):
+            self._header(lines, name, 'histogram')
+            for (n, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, c in zip(buckets + (float('inf'),), counts):
+                    cumulative += c
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{self.prefix}{name}_bucket{_label_str(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{self.prefix}{name}_sum{_label_str(labels)} {total}")
+                lines.append(f"{self.prefix}{name}_count{_label_str(labels)} {count}")
+
+        for name, fn in sorted(self._gauges.items()):
+            value = fn()
+            if value is None:
+                continue
+            self._header(lines, name, 'gauge')
+            if isinstance(value, dict):
+                for labels, v in sorted(value.items()):
+                    lines.append(f"{self.prefix}{name}{_label_str(labels)} {v}")
+            else:
+                lines.append(f"{self.prefix}{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {self.prefix}{name} {self._help[name]}")
+        lines.append(f"# TYPE {self.prefix}{name} {kind}")
+
+
+class SamplingProfiler:
+    """Statistical profiler that can be switched on and off in a running process.
+
+    A background thread snapshots every other thread's stack with
+    sys._current_frames() each interval and counts collapsed stacks
+    ("outer;inner;leaf"), the input format of flame-graph tools. Nothing
+    runs while it is stopped.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.interval = 0.005
+        self.samples = 0
+        self.stacks = Counter()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.005, reset=True):
+        if self.running:
+            return
+        self.interval = interval
+        if reset:
+            with self._lock:
+                self.samples = 0
+                self.stacks = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+        self._thread = None
+
+    def after_fork(self):
+        """Forget the sampling thread, which does not survive fork()"""
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def report(self, top=25):
+        with self._lock:
+            return {
+                'running': self.running,
+                'interval_ms': self.interval * 1000,
+                'samples': self.samples,
+                'top_stacks': [{'stack': s, 'count': c} for s, c in self.stacks.most_common(top)],
+            }
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    self.stacks[';'.join(reversed(stack))] += 1
+                    self.samples += 1
+
+
+
+class ProfilerSwitch:
+    """Turns a SamplingProfiler on and off in every worker process at once.
+
+    Under a pre-fork server each worker has its own profiler, and an admin
+    request reaches only one of them. set() writes the desired state to a
+    file in `folder`; every worker calls sync() per request and applies a
+    changed state within check_interval seconds. While profiling, each
+    worker also writes its stack counts to <pid>.json, and report() merges
+    all workers' counts from the current run.
+    """
+
+    def __init__(self, profiler, folder, check_interval=1.0):
+        self.profiler = profiler
+        self.folder = folder
+        self.state_path = os.path.join(folder, 'state.json')
+        self.check_interval = check_interval
+        self._applied = None
+        self._next_check = 0.0
+
+    def set(self, enabled, interval_ms=5.0):
+        """Record the state for all workers, starting a new run when enabling; applied here at once"""
+        os.makedirs(self.folder, exist_ok=True)
+        if enabled:
+            run = time.time_ns()
+            for name in os.listdir(self.folder):
+                if name.endswith('.json') and name != 'state.json':
+                    os.remove(os.path.join(self.folder, name))
+        else:
+            # Stopping keeps the run id so report() still finds its samples
+            run = (self._read_state() or {}).get('run', 0)
+        state = {'enabled': bool(enabled), 'interval_ms': float(interval_ms), 'run': run}
+        _write_json(self.state_path, state)
+        self.sync(force=True)
+
+    def sync(self, force=False):
+        """Apply the shared state if it changed; cheap no-op between checks"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        state = self._read_state()
+        if state is None:
+            return
+        if state != self._applied:
+            if state['enabled']:
+                self.profiler.stop()
+                self.profiler.start(interval=state['interval_ms'] / 1000)
+            else:
+                self.profiler.stop()
+                self._dump(self._applied)
+            self._applied = state
+        if self.profiler.running:
+            self._dump(state)
+
+    def after_fork(self):
+        """A forked worker has no profiler thread; re-apply the shared state on its first request"""
+        self.profiler.after_fork()
+        self._applied = None
+        self._next_check = 0.0
+
+    def report(self, top=25):
+        """Stack counts merged across every worker that sampled in the current run"""
+        self.sync(force=True)
+        report = self.profiler.report(top)
+        if not self._applied:
+            return dict(report, pid=os.getpid(), workers=[os.getpid()])
+        stacks, samples, workers = Counter(), 0, []
+        for name in sorted(os.listdir(self.folder)):
+            if name == 'state.json' or not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.folder, name)) as f:
+                    dump = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if dump.get('run') != self._applied['run']:
+                continue
+            stacks.update(dump['stacks'])
+            samples += dump['samples']
+            workers.append(dump['pid'])
+        report.update(
+            pid=os.getpid(),
+            workers=workers,
+            samples=samples,
+            top_stacks=[{'stack': s, 'count': c} for s, c in stacks.most_common(top)],
+        )
+        return report
+
+    def _read_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _dump(self, state):
+        if not state:
+            return
+        with self.profiler._lock:
+            dump = {'pid': os.getpid(), 'run': state['run'], 'samples': self.profiler.samples,
+                    'stacks': dict(self.profiler.stacks)}
+        _write_json(os.path.join(self.folder, f"{os.getpid()}.json"), dump)
+
+
+def _write_json(path, data):
+    """Write via a temporary file and rename, so readers never see half a file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def configure_logging():
+    """Leveled key=value logging to stderr; LOG_LEVEL=OFF silences it"""
+    level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    root = logging.getLogger('loan')
+    if level == 'OFF':
+        root.disabled = True
+        return root
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            'ts=%(asctime)s level=%(levelname)s logger=%(name)s %(message)s'))
+        root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    return root
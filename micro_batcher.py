@@ -0,0 +1,149 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger('loan.micro_batcher')
+
+
+class BatcherFull(Exception):
+    """Raised by submit() when too many requests are already waiting"""
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row scoring calls into vectorized batches.
+
+    Request threads call submit(row) and wait on the returned Future. A
+    single background worker takes the first waiting row, keeps collecting
+    for up to `window` seconds or until `max_batch` rows are waiting, scores
+    them with one score_fn(X) call and hands each caller its own result.
+    A lone request therefore waits at most one window; under load batches
+    fill before the window closes and the per-row cost falls.
+    """
+
+    _STOP = object()
+
+    def __init__(self, score_fn, max_batch=64, window=0.002, max_pending=10000):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0, 'rejected': 0, 'scored': 0, 'failed': 0,
+            'batches': 0, 'batch_size_max': 0, 'batch_ms_total': 0.0
+        }
+
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+        return self
+
+    def submit(self, row):
+        """Queue one feature row; the Future resolves to score_fn's result for it"""
+        if self._thread is None:
+            self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((row, future))
+        except queue.Full:
+            self._count('rejected')
+            raise BatcherFull("Too many pending scoring requests")
+        self._count('submitted')
+        return future
+
+    def score(self, row, timeout=None):
+        """submit() and wait for the result"""
+        return self.submit(row).result(timeout)
+
+    def after_fork(self):
+        """Reset in a forked worker: threads and queue locks do not survive fork()"""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        return self
+
+    def stop(self, timeout=5):
+        """Score everything still queued and stop the worker"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self):
+        """Batch counts, sizes and timings"""
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats['batches']
+        total_ms = stats.pop('batch_ms_total')
+        stats.update(
+            pending=self._queue.qsize(),
+            max_batch=self.max_batch,
+            window_ms=self.window * 1000,
+            batch_size_avg=round(stats['scored'] / batches, 2) if batches else 0.0,
+            batch_ms_avg=round(total_ms / batches, 3) if batches else 0.0,
+            running=self._thread is not None and self._thread.is_alive()
+        )
+        return stats
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.window
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if stopping:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not self._STOP:
+                        batch.append(item)
+
+            if batch:
+                self._score(batch)
+
+    def _score(self, batch):
+        start = time.perf_counter()
+        try:
+            results = self.score_fn(np.array([row for row, _ in batch], dtype=np.float64))
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error("event=micro_batch_failed rows=%d error=%r", len(batch), str(e))
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        with self._lock:
+            self._stats['scored'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['batch_ms_total'] += elapsed_ms
+            self._stats['batch_size_max'] = max(self._stats['batch_size_max'], len(batch))
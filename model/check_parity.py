@@ -0,0 +1,50 @@
+"""Check that the committed loan_weights.json still matches loan_model.pkl.
+
+Scores every complete row of dataset.csv with both artifacts and compares
+the margins and predicted classes. Exits non-zero on any disagreement, so
+it can run in CI after either file changes.
+
+    python model/check_parity.py
+"""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(MODEL_DIR, '..')
+sys.path.insert(0, ROOT)
+
+from features import SCHEMA
+from scorer import LinearScorer
+
+TOLERANCE = 1e-8
+
+
+def check(pipeline_path, weights_path, data_path):
+    """(rows checked, max margin difference, mismatched predictions)"""
+    with open(pipeline_path, 'rb') as f:
+        pipeline = pickle.load(f)
+    scorer = LinearScorer.load(weights_path)
+
+    df = pd.read_csv(data_path, dtype={'Dependents': 'str'})
+    matrix, valid = SCHEMA.encode_frame(df)
+    X = matrix[valid]
+
+    expected = pipeline.decision_function(pd.DataFrame(X, columns=scorer.features))
+    margins = scorer.decision_function(X)
+    mismatched = int((scorer.predict(X) != pipeline.predict(pd.DataFrame(X, columns=scorer.features))).sum())
+    return len(X), float(np.max(np.abs(margins - expected))), mismatched
+
+
+if __name__ == "__main__":
+    rows, max_diff, mismatched = check(os.path.join(MODEL_DIR, 'loan_model.pkl'),
+                                       os.path.join(MODEL_DIR, 'loan_weights.json'),
+                                       os.path.join(ROOT, 'dataset.csv'))
+    print(f"{rows} rows: max margin difference {max_diff:.2e}, {mismatched} predictions differ")
+    if max_diff > TOLERANCE or mismatched:
+        print("❌ loan_weights.json does not match loan_model.pkl; re-run model/export_weights.py")
+        sys.exit(1)
+    print("✅ loan_weights.json matches loan_model.pkl")
@@ -0,0 +1,90 @@
+import json
+import os
+import pickle
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+WEIGHTS_FILE = "loan_weights.json"
+
+
+def fold_pipeline(pipeline):
+    """Fold the StandardScaler into the linear SVM and return the weights dict"""
+    scaler = pipeline.named_steps['scaler']
+    svm = pipeline.named_steps['svm']
+
+    w = svm.coef_.ravel() / scaler.scale_
+    b = svm.intercept_[0] - np.dot(w, scaler.mean_)
+
+    return {
+        'features': list(scaler.feature_names_in_),
+        'coef': w.tolist(),
+        'intercept': float(b),
+        'classes': [int(c) for c in svm.classes_],
+        # Training means: coef * (x - mean) is each feature's exact
+        # contribution to the margin (standardized value x SVM weight)
+        'mean': scaler.mean_.tolist()
+    }
+
+
+def fit_sigmoid(margins, y):
+    """Platt scaling: fit P(y=1 | m) = 1 / (1 + exp(-(a*m + b))) on held-out margins"""
+    from sklearn.linear_model import LogisticRegression
+    lr = LogisticRegression(C=1e6)
+    lr.fit(np.asarray(margins).reshape(-1, 1), np.asarray(y))
+    return {'method': 'sigmoid', 'a': float(lr.coef_[0, 0]), 'b': float(lr.intercept_[0])}
+
+
+def export(pipeline, path=WEIGHTS_FILE, X_check=None, X_calib=None, y_calib=None, baseline=None):
+    """Write the folded weights and, if X_check is given, verify parity with the pipeline.
+
+    X_calib/y_calib should be data the model was not trained on; the margins
+    on it are used to fit the sigmoid confidence calibration. baseline is the
+    training-data feature sketch the app's drift monitor compares against.
+    """
+    weights = fold_pipeline(pipeline)
+    if baseline is not None:
+        weights['drift_baseline'] = baseline
+
+    if X_calib is not None:
+        X_calib = np.asarray(X_calib, dtype=np.float64)
+        margins = X_calib @ np.array(weights['coef']) + weights['intercept']
+        weights['calibration'] = fit_sigmoid(margins, y_calib)
+
+    if X_check is not None:
+        X = np.asarray(X_check, dtype=np.float64)
+        folded = X @ np.array(weights['coef']) + weights['intercept']
+        expected = pipeline.decision_function(pd.DataFrame(X, columns=weights['features']))
+        assert np.allclose(folded, expected, atol=1e-8), "Folded weights disagree with the pipeline"
+        predicted = np.array(weights['classes'])[(folded > 0).astype(int)]
+        assert (predicted == pipeline.predict(pd.DataFrame(X, columns=weights['features']))).all()
+
+    with open(path, "w") as f:
+        json.dump(weights, f, indent=2)
+    return weights
+
+
+if __name__ == "__main__":
+    pipeline = pickle.load(open("loan_model.pkl", "rb"))
+
+    # Parity check on every row of the dataset (with the training encoding)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from features import SCHEMA, TARGET, TARGET_MAP
+    from drift import FeatureSketch
+
+    df = pd.read_csv("../dataset.csv", dtype={'Dependents': 'str'})
+    matrix, valid = SCHEMA.encode_frame(df)
+    target = df[TARGET].map(TARGET_MAP)
+    valid &= target.notna().to_numpy()
+    X = pd.DataFrame(matrix[valid], columns=SCHEMA.columns)
+    y = target[valid].astype(int).reset_index(drop=True)
+
+    # Same held-out split as model/model.py, used to calibrate confidence
+    X_train, X_test, _, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    baseline = FeatureSketch.for_reference(X_train.values)
+    baseline.update(X_train.values)
+
+    export(pipeline, WEIGHTS_FILE, X_check=X.values, X_calib=X_test.values, y_calib=y_test.values,
+           baseline=baseline.to_dict())
+    print(f"✅ Linear weights exported to {WEIGHTS_FILE} (parity checked on {len(X)} rows)")
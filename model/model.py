@@ -1,3 +1,5 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 import pickle
@@ -6,28 +8,24 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn import svm
 from sklearn.metrics import accuracy_score, confusion_matrix
+from export_weights import export, WEIGHTS_FILE
 
-# Load data
-df = pd.read_csv("../dataset.csv")
-df = df.dropna()
-
-# Encoding
-df.replace({"Loan_Status": {'N': 0, 'Y': 1}}, inplace=True)
-df.replace(to_replace='3+', value=4, inplace=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from features import SCHEMA, TARGET, TARGET_MAP
+from drift import FeatureSketch
 
-df.replace({
-    'Married': {'No': 0, 'Yes': 1},
-    'Gender': {'Male': 1, 'Female': 0},
-    'Self_Employed': {'No': 0, 'Yes': 1},
-    'Property_Area': {'Rural': 0, 'Semiurban': 1, 'Urban': 2},
-    'Education': {'Graduate': 1, 'Not Graduate': 0}
-}, inplace=True)
+# Load data
+df = pd.read_csv("../dataset.csv", dtype={'Dependents': 'str'})
 
-df = df.infer_objects(copy=False)
+# Encoding: the shared feature schema (same codes and ranges the web app
+# validates with); rows with missing or invalid values are dropped
+matrix, valid = SCHEMA.encode_frame(df)
+target = df[TARGET].map(TARGET_MAP)
+valid &= target.notna().to_numpy()
 
 # Split
-X = df.drop(columns=['Loan_ID', 'Loan_Status'])
-y = df['Loan_Status']
+X = pd.DataFrame(matrix[valid], columns=SCHEMA.columns)
+y = target[valid].astype(int).reset_index(drop=True)
 
 X_train, X_test, y_train, y_test = train_test_split(
     X, y,
@@ -56,3 +54,13 @@ print("Confusion Matrix:\n", confusion_matrix(y_test, pipeline.predict(X_test)))
 # Save
 pickle.dump(pipeline, open("loan_model.pkl", "wb"))
 print("✅ FINAL BALANCED MODEL SAVED")
+
+# Training-data feature distribution, the baseline for the app's drift monitor
+baseline = FeatureSketch.for_reference(X_train.values)
+baseline.update(X_train.values)
+
+# Export folded linear weights for the NumPy scorer used by the web app,
+# calibrating confidence on the held-out test split
+export(pipeline, WEIGHTS_FILE, X_check=X.values, X_calib=X_test.values, y_calib=y_test.values,
+       baseline=baseline.to_dict())
+print(f"✅ Linear weights exported to {WEIGHTS_FILE}")
@@ -0,0 +1,136 @@
+"""Out-of-core training for the loan model.
+
+Streams the CSV in chunks, encodes them with the shared feature schema and
+fits StandardScaler + a hinge-loss SGDClassifier (a linear SVM) with
+partial_fit, so memory stays bounded by the chunk size. Writes the same
+artifacts as model.py: loan_model.pkl and loan_weights.json.
+
+    python model/train.py --data dataset.csv --chunksize 200000 --alpha 1e-6
+"""
+import argparse
+import os
+import pickle
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from export_weights import export, WEIGHTS_FILE
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# Same schema (categories, ranges) the web app validates requests with
+from features import SCHEMA, TARGET, TARGET_MAP
+from drift import FeatureSketch
+
+FEATURES = SCHEMA.columns
+
+
+@contextmanager
+def stage(name, report):
+    """Record wall time and peak traced memory of a training stage"""
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    yield
+    _, peak = tracemalloc.get_traced_memory()
+    report.append((name, time.perf_counter() - start, peak / 2**20))
+
+
+def read_chunks(path, chunksize):
+    """Yield encoded (X DataFrame, y array, holdout mask) chunks from the CSV"""
+    offset = 0
+    for chunk in pd.read_csv(path, usecols=FEATURES + [TARGET], dtype={'Dependents': 'str'},
+                             chunksize=chunksize):
+        matrix, valid = SCHEMA.encode_frame(chunk)
+        y = chunk[TARGET].map(TARGET_MAP).to_numpy(dtype=np.float64, na_value=np.nan)
+        valid &= ~np.isnan(y)
+
+        # Deterministic 80/20 split on the position in the file
+        position = offset + np.arange(valid.sum())
+        offset += len(position)
+
+        X = pd.DataFrame(matrix[valid], columns=FEATURES)
+        yield X, y[valid].astype(np.int64), position % 5 == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core training for the loan model")
+    parser.add_argument('--data', default=os.path.join(HERE, '..', 'dataset.csv'))
+    parser.add_argument('--chunksize', type=int, default=200000)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--alpha', type=float, default=1e-2,
+                        help='L2 regularization, about 1 / (C * training rows); '
+                             'the default matches model.py (C=0.3) on dataset.csv')
+    parser.add_argument('--holdout-max', type=int, default=200000,
+                        help='holdout rows kept in memory for evaluation and calibration')
+    parser.add_argument('--model-out', default=os.path.join(HERE, 'loan_model.pkl'))
+    parser.add_argument('--weights-out', default=os.path.join(HERE, WEIGHTS_FILE))
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    report = []
+    scaler = StandardScaler()
+    class_counts = np.zeros(2, dtype=np.int64)
+    holdout_X, holdout_y, holdout_rows = [], [], 0
+
+    # Pass 1: scaler statistics, class balance, the holdout sample and the
+    # drift baseline (bins taken from the first chunk's quantiles)
+    baseline = None
+    with stage('scan + scale stats', report):
+        for X, y, hold in read_chunks(args.data, args.chunksize):
+            scaler.partial_fit(X[~hold])
+            train_rows = X.to_numpy()[~hold]
+            if baseline is None:
+                baseline = FeatureSketch.for_reference(train_rows)
+            baseline.update(train_rows)
+            class_counts += np.bincount(y[~hold], minlength=2)
+            if holdout_rows < args.holdout_max:
+                take = np.flatnonzero(hold)[:args.holdout_max - holdout_rows]
+                holdout_X.append(X.to_numpy()[take])
+                holdout_y.append(y[take])
+                holdout_rows += len(take)
+    holdout_X = np.vstack(holdout_X)
+    holdout_y = np.concatenate(holdout_y)
+
+    # 'balanced' class weights, as in model.py
+    class_weight = class_counts.sum() / (2 * np.maximum(class_counts, 1))
+    sgd = SGDClassifier(loss='hinge', alpha=args.alpha, learning_rate='optimal', random_state=42)
+    rng = np.random.default_rng(42)
+
+    # Passes 2..n: SGD epochs over the training rows
+    for epoch in range(args.epochs):
+        with stage(f'epoch {epoch + 1}', report):
+            for X, y, hold in read_chunks(args.data, args.chunksize):
+                order = rng.permutation(np.flatnonzero(~hold))
+                Xs = scaler.transform(X.iloc[order])
+                sgd.partial_fit(Xs, y[order], classes=np.array([0, 1]),
+                                sample_weight=class_weight[y[order]])
+
+    pipeline = Pipeline([('scaler', scaler), ('svm', sgd)])
+
+    with stage('evaluate + export', report):
+        holdout_df = pd.DataFrame(holdout_X, columns=FEATURES)
+        accuracy = (pipeline.predict(holdout_df) == holdout_y).mean()
+        with open(args.model_out, 'wb') as f:
+            pickle.dump(pipeline, f)
+        export(pipeline, args.weights_out, X_check=holdout_X, X_calib=holdout_X, y_calib=holdout_y,
+               baseline=baseline.to_dict())
+
+    print(f"{'stage':<22}{'seconds':>10}{'peak MB':>10}")
+    for name, seconds, peak in report:
+        print(f"{name:<22}{seconds:>10.2f}{peak:>10.1f}")
+    print(f"Process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    print(f"Train rows: {class_counts.sum()}  Holdout rows: {len(holdout_y)}  Holdout accuracy: {accuracy:.3f}")
+    print(f"✅ Model saved to {args.model_out}, weights to {args.weights_out}")
+
+
+if __name__ == "__main__":
+    main()
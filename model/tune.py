@@ -0,0 +1,140 @@
+"""Parallel hyperparameter search for the loan SVM.
+
+Grid (or successive-halving) search over C, kernel and class weighting with
+stratified k-fold cross-validation. Each fold's scaled matrices are built
+once in the parent and shipped to every worker process a single time, so
+candidates never redo the preprocessing. Writes a leaderboard CSV.
+
+    python model/tune.py --folds 5 --jobs 16
+    python model/tune.py --halving --C 0.01 0.03 0.1 0.3 1 3 10
+"""
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn import svm
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from train import read_chunks, HERE
+
+# Per-process fold cache, filled once by the pool initializer
+_FOLDS = None
+
+
+def load_dataset(path):
+    """Encoded (X, y) arrays for the whole CSV"""
+    parts = list(read_chunks(path, chunksize=500000))
+    X = np.vstack([X.to_numpy() for X, _, _ in parts])
+    y = np.concatenate([y for _, y, _ in parts])
+    return X, y
+
+
+def build_folds(X, y, n_folds, seed):
+    """Scale each stratified fold once: list of (X_train, y_train, X_test, y_test)"""
+    folds = []
+    for train_idx, test_idx in StratifiedKFold(n_folds, shuffle=True, random_state=seed).split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append((scaler.transform(X[train_idx]), y[train_idx],
+                      scaler.transform(X[test_idx]), y[test_idx]))
+    return folds
+
+
+def _init_worker(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+
+def evaluate(task):
+    """Fit one candidate on one cached fold"""
+    params, fold = task
+    X_train, y_train, X_test, y_test = _FOLDS[fold]
+    clf = svm.SVC(**params)
+
+    start = time.perf_counter()
+    clf.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = clf.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    return params, fold, accuracy_score(y_test, predicted), fit_s, predict_s
+
+
+def leaderboard(results):
+    """Aggregate (params, fold) results into one row per candidate, best first"""
+    rows = []
+    for key, scores in results.items():
+        acc = np.array([s[0] for s in scores.values()])
+        params = dict(key)
+        rows.append({
+            **params,
+            'class_weight': params['class_weight'] or 'none',
+            'mean_accuracy': acc.mean(),
+            'std_accuracy': acc.std(),
+            'folds': len(acc),
+            'mean_fit_ms': 1000 * np.mean([s[1] for s in scores.values()]),
+            'mean_predict_ms': 1000 * np.mean([s[2] for s in scores.values()]),
+        })
+    board = pd.DataFrame(rows)
+    return board.sort_values(['folds', 'mean_accuracy'], ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the loan SVM")
+    parser.add_argument('--data', default=os.path.join(HERE, '..', 'dataset.csv'))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--C', type=float, nargs='+', default=[0.01, 0.03, 0.1, 0.3, 1.0, 3.0])
+    parser.add_argument('--kernel', nargs='+', default=['linear', 'rbf'])
+    parser.add_argument('--class-weight', nargs='+', default=['balanced', 'none'])
+    parser.add_argument('--halving', action='store_true',
+                        help='successive halving: start on one fold, keep the best 1/eta each rung')
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=os.path.join(HERE, 'tuning_leaderboard.csv'))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    X, y = load_dataset(args.data)
+    folds = build_folds(X, y, args.folds, args.seed)
+    print(f"Data: {len(y)} rows, {args.folds} folds prepared in {time.perf_counter() - start:.2f}s")
+
+    candidates = [
+        tuple(sorted({'C': C, 'kernel': kernel,
+                      'class_weight': None if cw == 'none' else cw}.items()))
+        for C, kernel, cw in itertools.product(args.C, args.kernel, args.class_weight)
+    ]
+    results = {c: {} for c in candidates}
+    n_folds = 1 if args.halving else args.folds
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(folds,)) as pool:
+        while True:
+            tasks = [(dict(c), f) for c in candidates for f in range(n_folds) if f not in results[c]]
+            for params, fold, acc, fit_s, predict_s in pool.map(evaluate, tasks, chunksize=4):
+                results[tuple(sorted(params.items()))][fold] = (acc, fit_s, predict_s)
+            print(f"  {len(candidates)} candidates x {n_folds} folds done")
+
+            if n_folds >= args.folds or len(candidates) == 1:
+                break
+            scored = sorted(candidates, key=lambda c: -np.mean([r[0] for r in results[c].values()]))
+            candidates = scored[:max(1, math.ceil(len(candidates) / args.eta))]
+            n_folds = min(args.folds, n_folds * args.eta)
+
+    board = leaderboard(results)
+    board.to_csv(args.out, index=False)
+    print(f"Search took {time.perf_counter() - start:.2f}s on {args.jobs} processes")
+    print(board.head(10).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"✅ Leaderboard saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from scorer import LinearScorer
+
+LIVE = 'LIVE'
+CANDIDATE = 'CANDIDATE'
+
+logger = logging.getLogger('loan.models')
+
+
+class ModelStore:
+    """Directory of immutable, named weight files plus LIVE / CANDIDATE pointers.
+
+    model/versions/
+        v1.json, v2.json, ...   published weights (never overwritten)
+        LIVE                    name of the version serving traffic
+        CANDIDATE               optional version scored in shadow mode
+
+    Every write goes to a temp file followed by os.replace(), so readers see
+    either the old or the new file, never a partial one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, name):
+        return os.path.join(self.root, f"{name}.json")
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-5] for f in os.listdir(self.root) if f.endswith('.json'))
+
+    def publish(self, source, name):
+        """Copy a weights file into the store as version `name`"""
+        if not name or os.sep in name or name in (LIVE, CANDIDATE):
+            raise ValueError(f"Invalid version name {name!r}")
+        if os.path.exists(self.path(name)):
+            raise ValueError(f"Version {name!r} already exists; versions are immutable")
+        os.makedirs(self.root, exist_ok=True)
+        with open(source, 'rb') as src:
+            self._atomic_write(self.path(name), src.read())
+
+    def pointer(self, which):
+        """Version name a pointer refers to, or None"""
+        try:
+            with open(os.path.join(self.root, which)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def set_pointer(self, which, name):
+        if name not in self.versions():
+            raise ValueError(f"Unknown version {name!r}")
+        self._atomic_write(os.path.join(self.root, which), name.encode())
+
+    def clear_pointer(self, which):
+        try:
+            os.remove(os.path.join(self.root, which))
+        except FileNotFoundError:
+            pass
+
+    def _atomic_write(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+class ShadowStats:
+    """Running comparison of the candidate model against the live one"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, candidate=None):
+        with self._lock:
+            self.candidate = candidate
+            self.rows = self.agree = 0
+            self.live_s = self.candidate_s = 0.0
+
+    def record(self, rows, agree, live_s, candidate_s):
+        with self._lock:
+            self.rows += rows
+            self.agree += agree
+            self.live_s += live_s
+            self.candidate_s += candidate_s
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'candidate': self.candidate,
+                'rows': self.rows,
+                'agreement': round(self.agree / self.rows * 100, 2) if self.rows else None,
+                'live_us_per_row': round(self.live_s / self.rows * 1e6, 3) if self.rows else None,
+                'candidate_us_per_row': round(self.candidate_s / self.rows * 1e6, 3) if self.rows else None,
+            }
+
+
+class ModelRegistry:
+    """Owns the scoring models: lazy loading, warm-up and hot reload.
+
+    The live model comes from the store's LIVE pointer, or from `path` when
+    there is no store. Nothing is read from disk until get() or load() is
+    first called, so importing the app stays cheap; call load() (or
+    warm_up()) before forking workers to share one loaded copy.
+
+    get() re-checks the pointer and file mtimes at most every check_interval
+    seconds. A changed model is loaded off to the side and swapped in with a
+    single reference assignment, so scoring threads never take a lock and
+    in-flight requests keep the model they already hold. Listeners
+    registered with on_reload() run after each live swap.
+    """
+
+    def __init__(self, path, store=None, loader=LinearScorer.load, check_interval=1.0):
+        self.path = path
+        self.store = store
+        self.loader = loader
+        self.check_interval = check_interval
+        self.last_error = None
+        self.shadow = ShadowStats()
+        self._model = None
+        self._candidate = None
+        self._keys = {LIVE: None, CANDIDATE: None}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_reload(self, callback):
+        """Run callback(model) whenever a new live model is swapped in"""
+        self._listeners.append(callback)
+
+    def get(self):
+        """Current live model (loading or reloading it if needed), or None if unavailable"""
+        now = time.monotonic()
+        if self._model is None or now - self._checked >= self.check_interval:
+            self._checked = now
+            self._refresh()
+        return self._model
+
+    @property
+    def candidate(self):
+        """Candidate model for shadow scoring, or None"""
+        return self._candidate
+
+    def load(self):
+        """Load (or reload) the models now; returns the live model or None"""
+        self._checked = time.monotonic()
+        self._refresh()
+        return self._model
+
+    def promote(self, name):
+        """Point LIVE at a stored version and swap it in immediately"""
+        self.store.set_pointer(LIVE, name)
+        if self.store.pointer(CANDIDATE) == name:
+            self.store.clear_pointer(CANDIDATE)
+        return self.load()
+
+    def warm_up(self):
+        """Load the models and score one dummy row so first requests are not slow"""
+        model = self.load()
+        for m in (model, self._candidate):
+            if m is not None:
+                dummy = [[0.0] * len(m.features)]
+                m.predict(dummy)
+                m.confidence(dummy)
+        return model
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    @property
+    def version(self):
+        return self._model.version if self._model is not None else None
+
+    def status(self):
+        return {
+            'live': self.version,
+            'candidate': self._candidate.version if self._candidate is not None else None,
+            'versions': self.store.versions() if self.store else [],
+            'error': self.last_error,
+            'shadow': self.shadow.snapshot(),
+        }
+
+    def _resolve(self, which):
+        """(path, version name) a slot should be loaded from, or (None, None)"""
+        name = self.store.pointer(which) if self.store else None
+        if name:
+            return self.store.path(name), name
+        if which == LIVE:
+            return self.path, None
+        return None, None
+
+    def _refresh(self):
+        for which in (LIVE, CANDIDATE):
+            path, name = self._resolve(which)
+            if path is None:
+                if which == CANDIDATE and self._candidate is not None:
+                    self._candidate, self._keys[CANDIDATE] = None, None
+                    self.shadow.reset()
+                continue
+            try:
+                key = (path, os.path.getmtime(path))
+            except OSError as e:
+                self.last_error = str(e)
+                continue
+            if key != self._keys[which]:
+                self._swap(which, key, name)
+
+    def _swap(self, which, key, name):
+        with self._lock:
+            if key == self._keys[which]:
+                return
+            try:
+                model = self.loader(key[0])
+            except (OSError, ValueError, KeyError) as e:
+                self.last_error = str(e)
+                logger.warning("event=model_load_failed slot=%s error=%r", which, str(e))
+                return
+            if name:
+                model.version = name
+            self._keys[which] = key
+            self.last_error = None
+
+            if which == CANDIDATE:
+                self._candidate = model
+                self.shadow.reset(model.version)
+                logger.info("event=candidate_loaded version=%s", model.version)
+                return
+            reloaded = self._model is not None
+            self._model = model
+
+        for callback in self._listeners:
+            callback(model)
+        logger.info("event=%s version=%s", 'model_reloaded' if reloaded else 'model_loaded', model.version)
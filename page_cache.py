@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth a compressed variant
+MIN_COMPRESS_BYTES = 512
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+class CachedBody:
+    """One response body plus its gzip/brotli variants, built once.
+
+    Each variant gets its own strong ETag (the content hash plus the
+    encoding), so a cache never confuses the compressed and plain bodies.
+    """
+
+    def __init__(self, body, content_type, last_modified=None, cache_control=REVALIDATE):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.last_modified = int(last_modified or time.time())
+        self.last_modified_http = formatdate(self.last_modified, usegmt=True)
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {'identity': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=11)
+        self.etags = {encoding: f'{self.digest}-{encoding}' if encoding != 'identity' else self.digest
+                      for encoding in self.variants}
+
+    def encoding_for(self, accept_encodings):
+        """Smallest variant the client accepts"""
+        best = 'identity'
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding]:
+                if len(self.variants[encoding]) < len(self.variants[best]):
+                    best = encoding
+        return best
+
+    def not_modified(self):
+        """True when the request's validators still match this body"""
+        if request.if_none_match:
+            return any(request.if_none_match.contains(etag) for etag in self.etags.values())
+        since = request.if_modified_since
+        return since is not None and since.timestamp() >= self.last_modified
+
+    def respond(self):
+        """200 with the best encoding, or 304 for a matching conditional GET"""
+        encoding = self.encoding_for(request.accept_encodings)
+        headers = {
+            'ETag': f'"{self.etags[encoding]}"',
+            'Last-Modified': self.last_modified_http,
+            'Cache-Control': self.cache_control,
+        }
+        if len(self.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if self.not_modified():
+            return Response(status=304, headers=headers)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.variants[encoding], content_type=self.content_type, headers=headers)
+
+
+class StaticAssets:
+    """Content-fingerprinted URLs for the files under static/.
+
+    url('css/style.css') returns /assets/css/style.<hash>.css. The hash
+    changes whenever the file does, so those URLs can be cached for a year.
+    Nothing is read until scan(); before that url() returns plain /static/
+    URLs.
+    """
+
+    def __init__(self, folder, prefix='/assets/'):
+        self.folder = folder
+        self.prefix = prefix
+        self._urls = {}
+        self._files = {}
+
+    def scan(self):
+        """(Re)hash every file and build its compressed variants"""
+        urls, files = {}, {}
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                if content_type.startswith('text/') or content_type.endswith('javascript'):
+                    content_type += '; charset=utf-8'
+                entry = CachedBody(body, content_type, os.path.getmtime(path), IMMUTABLE)
+                stem, ext = os.path.splitext(relative)
+                fingerprinted = f"{stem}.{entry.digest[:10]}{ext}"
+                urls[relative] = self.prefix + fingerprinted
+                files[fingerprinted] = entry
+        self._urls, self._files = urls, files
+
+    def url(self, filename):
+        """Fingerprinted URL for a static file (the plain /static/ URL if unknown)"""
+        return self._urls.get(filename, '/static/' + filename)
+
+    def get(self, fingerprinted):
+        return self._files.get(fingerprinted)
+
+    def stats(self):
+        return {
+            'files': len(self._files),
+            'bytes': sum(len(e.variants['identity']) for e in self._files.values()),
+            'compressed_bytes': sum(min(len(v) for v in e.variants.values()) for e in self._files.values()),
+        }
+
+
+class PageCache:
+    """Rendered HTML of pages whose output does not depend on the request.
+
+    get() renders a page on its first request (or build() renders all of
+    them up front) and keeps the body and its compressed variants for the
+    life of the process. clear() forces a re-render, e.g. after a template
+    change.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.not_modified = 0
+
+    def get(self, key, render):
+        page = self._pages.get(key)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None:
+                    self.misses += 1
+                    page = self._pages[key] = CachedBody(render().encode('utf-8'), 'text/html; charset=utf-8')
+                    return page
+        self.hits += 1
+        return page
+
+    def serve(self, key, render):
+        """Response for a cached page; renders every time when the cache is disabled"""
+        if not self.enabled:
+            return render()
+        response = self.get(key, render).respond()
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def build(self, pages):
+        """Render {key: render_fn} ahead of the first request"""
+        if self.enabled:
+            for key, render in pages.items():
+                self.get(key, render)
+
+    def clear(self):
+        with self._lock:
+            self._pages = {}
+
+    def stats(self):
+        pages = dict(self._pages)
+        return {
+            'enabled': self.enabled,
+            'pages': len(pages),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'brotli': brotli is not None,
+            'bytes': {key: {enc: len(body) for enc, body in page.variants.items()}
+                      for key, page in pages.items()},
+        }
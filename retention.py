@@ -0,0 +1,209 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from database import db, Prediction, SessionStats, update_session_stats
+from export import EXPORT_COLUMNS
+
+logger = logging.getLogger('loan.retention')
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def archive_path(archive_dir, timestamp):
+    """Monthly partition file holding rows from the timestamp's month"""
+    return os.path.join(archive_dir, f"predictions-{timestamp:%Y-%m}.csv.gz")
+
+
+def archive_rows(archive_dir, rows):
+    """Append rows to their monthly gzip CSV partitions; returns the files touched.
+
+    Each call appends one gzip member per partition (gzip readers treat
+    concatenated members as one stream) and fsyncs it before the caller
+    deletes the rows. A crash between the two can archive a row twice; the
+    id column identifies duplicates.
+    """
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(archive_path(archive_dir, row.timestamp), []).append(row)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    for path, partition in by_month.items():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not os.path.exists(path):
+            writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(partition)
+        with open(path, 'ab') as f:
+            f.write(gzip.compress(buffer.getvalue().encode('utf-8')))
+            f.flush()
+            os.fsync(f.fileno())
+    return sorted(by_month)
+
+
+def database_bytes():
+    """(allocated bytes, free-list bytes) of a SQLite database; (None, None) elsewhere"""
+    if db.engine.dialect.name != 'sqlite':
+        return None, None
+    with db.engine.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        page_count = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        freelist = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return page_count * page_size, freelist * page_size
+
+
+def enable_incremental_vacuum():
+    """Switch an existing SQLite file to auto_vacuum=INCREMENTAL (one full VACUUM)"""
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == AUTO_VACUUM_INCREMENTAL:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def incremental_vacuum(step_pages=1000, pause=0.01):
+    """Release free pages to the OS a step at a time; returns pages released or None if unavailable"""
+    if db.engine.dialect.name != 'sqlite':
+        return None
+    released = 0
+    raw = db.engine.raw_connection()
+    try:
+        # executescript() steps the pragma to completion; execute() would
+        # stop after the first page
+        conn = raw.driver_connection
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return None
+        while True:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            conn.executescript(f"PRAGMA incremental_vacuum({int(step_pages)});")
+            released += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(pause)
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    finally:
+        raw.close()
+    return released
+
+
+def delete_chunk(rows):
+    """Delete archived rows and take them out of their sessions' aggregates in one commit.
+
+    The aggregates are decremented by the rows the DELETE actually removed,
+    which can be fewer than were fetched if /clear_history ran in between.
+    Returns the number of rows deleted.
+    """
+    columns = (Prediction.session_id, Prediction.prediction_result, Prediction.confidence)
+    ids = [row.id for row in rows]
+    delete = db.delete(Prediction).where(Prediction.id.in_(ids))
+    try:
+        if db.engine.dialect.delete_returning:
+            deleted = db.session.execute(delete.returning(*columns)).all()
+        else:
+            deleted = db.session.execute(
+                db.select(*columns).where(Prediction.id.in_(ids)).with_for_update()).all()
+            db.session.execute(delete)
+        per_session = {}
+        for row in deleted:
+            agg = per_session.setdefault(row.session_id, [0, 0, 0.0])
+            agg[0] -= 1
+            agg[1] -= row.prediction_result == 1
+            agg[2] -= row.confidence or 0.0
+        for session_id, (total, approved, confidence_sum) in per_session.items():
+            update_session_stats(session_id, total, approved, confidence_sum)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(deleted)
+
+
+def run_retention(ttl_days, archive_dir=None, chunk_size=500, session_batch=100,
+                  pause=0.01, vacuum_step=1000, now=None):
+    """Expire sessions idle for more than ttl_days and return a report of what was reclaimed.
+
+    Expired sessions are walked in session_id order, session_batch at a
+    time. Their rows are archived (when archive_dir is set) and deleted in
+    chunks of chunk_size, each chunk in its own short transaction followed
+    by a pause, so request writers only ever wait for one small commit.
+    Free pages are then released with incremental vacuum.
+    """
+    started = time.perf_counter()
+    cutoff = (now or datetime.utcnow()) - timedelta(days=ttl_days)
+    bytes_before, _ = database_bytes()
+    report = {
+        'cutoff': cutoff.isoformat(timespec='seconds'),
+        'ttl_days': ttl_days,
+        'sessions_expired': 0,
+        'rows_deleted': 0,
+        'rows_archived': 0,
+        'archive_files': [],
+    }
+    archive_files = set()
+
+    after = ''
+    while True:
+        sessions = db.session.execute(
+            db.select(SessionStats.session_id)
+            .where(SessionStats.last_seen < cutoff, SessionStats.session_id > after)
+            .order_by(SessionStats.session_id)
+            .limit(session_batch)
+        ).scalars().all()
+        db.session.commit()
+        if not sessions:
+            break
+        after = sessions[-1]
+
+        while True:
+            rows = db.session.execute(
+                db.select(*Prediction.__table__.columns)
+                .where(Prediction.session_id.in_(sessions), Prediction.timestamp < cutoff)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                db.session.commit()
+                break
+            if archive_dir:
+                archive_files.update(archive_rows(archive_dir, rows))
+                report['rows_archived'] += len(rows)
+            report['rows_deleted'] += delete_chunk(rows)
+            time.sleep(pause)
+
+        # Sessions that saw no new predictions while we worked are now empty
+        report['sessions_expired'] += db.session.execute(
+            db.delete(SessionStats).where(
+                SessionStats.session_id.in_(sessions),
+                SessionStats.last_seen < cutoff,
+                SessionStats.total <= 0
+            )
+        ).rowcount
+        db.session.commit()
+
+    report['archive_files'] = sorted(archive_files)
+    released = incremental_vacuum(vacuum_step, pause)
+    bytes_after, free_after = database_bytes()
+    report.update(
+        vacuum='incremental' if released is not None else 'unavailable',
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        bytes_reclaimed=bytes_before - bytes_after if bytes_before is not None else None,
+        free_bytes_after=free_after,
+        elapsed_s=round(time.perf_counter() - started, 3)
+    )
+    logger.info("event=retention_run sessions=%d rows_deleted=%d rows_archived=%d bytes_reclaimed=%s",
+                report['sessions_expired'], report['rows_deleted'], report['rows_archived'],
+                report['bytes_reclaimed'])
+    return report
+
+
+def append_report(path, report):
+    """Append one run's report to a JSON-lines log"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(report) + '\n')
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import numpy as np
+
+
+class LinearScorer:
+    """Scores applicants with the folded StandardScaler + linear SVM weights.
+
+    The training pipeline is ``(x - mean) / scale`` followed by ``w . z + b``,
+    which folds into a single ``coef . x + intercept``. Only NumPy is needed
+    at inference time.
+    """
+
+    def __init__(self, coef, intercept, features, classes=(0, 1), calibration=None, version=None,
+                 mean=None, drift_baseline=None):
+        self.version = version
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.features = list(features)
+        self.classes = np.asarray(classes)
+        self.calibration = calibration
+        # Precomputed for explain(): margin = base_value + sum(contributions)
+        self.mean = np.asarray(mean, dtype=np.float64) if mean is not None else None
+        self.base_value = self.intercept + float(self.coef @ self.mean) if mean is not None else None
+        # Training-data feature sketch (drift.FeatureSketch.to_dict()), if exported
+        self.drift_baseline = drift_baseline
+
+    @classmethod
+    def load(cls, path):
+        """Load weights written by model/export_weights.py"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        version = hashlib.sha1(raw).hexdigest()[:12]
+        return cls(data['coef'], data['intercept'], data['features'],
+                   data.get('classes', (0, 1)), data.get('calibration'), version, data.get('mean'),
+                   data.get('drift_baseline'))
+
+    def decision_function(self, X):
+        """Signed margin for each row of X (2-D array-like)"""
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict(self, X):
+        """Predicted class for each row of X"""
+        return self.classes[(self.decision_function(X) > 0).astype(int)]
+
+    def predict_proba(self, X):
+        """Calibrated probability of approval for each row of X.
+
+        Uses the sigmoid fitted on held-out margins at export time; returns
+        None when the weights file has no calibration.
+        """
+        if not self.calibration:
+            return None
+        return self._calibrated(self.decision_function(X))
+
+    def _calibrated(self, margins):
+        return 1.0 / (1.0 + np.exp(-(self.calibration['a'] * margins + self.calibration['b'])))
+
+    def confidence(self, X, default=83.0):
+        """Calibrated probability (0-100) of the class predict() returns, for each row of X.
+
+        The sigmoid does not cross 0.5 exactly at margin 0, so this is
+        P(approve) for approved rows and 1 - P(approve) for rejected ones,
+        never simply the larger of the two.
+        """
+        if not self.calibration:
+            return np.full(len(X), default)
+        m = self.decision_function(X)
+        p = self._calibrated(m)
+        return np.round(np.where(m > 0, p, 1.0 - p) * 100, 1)
+
+    def contributions(self, X):
+        """Per-feature contribution to the margin for each row of X (n x features).
+
+        For StandardScaler + linear SVM this is exact: the standardized value
+        times the SVM weight, i.e. coef * (x - mean). Rows sum to
+        decision_function(X) - base_value. None if the weights file has no means.
+        """
+        if self.mean is None:
+            return None
+        return (np.asarray(X, dtype=np.float64) - self.mean) * self.coef
+
+    def explain(self, X, top=None):
+        """Ranked contributions per row: [[(feature, contribution), ...], ...], largest first"""
+        contrib = self.contributions(X)
+        if contrib is None:
+            return None
+        order = np.argsort(-np.abs(contrib), axis=1)[:, :top]
+        ranked = np.take_along_axis(contrib, order, axis=1)
+        return [
+            [(self.features[j], float(v)) for j, v in zip(idx, vals)]
+            for idx, vals in zip(order.tolist(), ranked.tolist())
+        ]
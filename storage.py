@@ -0,0 +1,78 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_DATABASE_URI = 'sqlite:///predictions.db'
+
+# PRAGMAs applied to every new SQLite connection, per storage profile
+SQLITE_PROFILES = {
+    # SQLite defaults: rollback journal, no busy wait, synchronous=FULL
+    'default': {},
+    # WAL lets readers run alongside the single writer, busy_timeout makes
+    # concurrent writers wait instead of failing with "database is locked",
+    # and synchronous=NORMAL is durable in WAL mode without an fsync per commit.
+    # auto_vacuum only takes effect on a new file (or after one VACUUM, see
+    # `flask retention --enable-incremental-vacuum`) and lets retention hand
+    # freed pages back to the OS with PRAGMA incremental_vacuum
+    'tuned': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def engine_options(uri, profile='tuned'):
+    """SQLAlchemy create_engine() options suited to the database backend"""
+    if uri.startswith('sqlite'):
+        # Match the busy_timeout at the driver level too
+        timeout = SQLITE_PROFILES[profile].get('busy_timeout', 5000) / 1000
+        return {'connect_args': {'timeout': timeout}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, profile='tuned'):
+    """Run the profile's PRAGMAs on a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PROFILES[profile].items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def listen_for_sqlite(profile='tuned'):
+    """Apply the profile's PRAGMAs to every new SQLite connection from any engine"""
+    @event.listens_for(Engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_sqlite_pragmas(dbapi_connection, profile)
+
+
+def configure_storage(app):
+    """Set the database URI and engine options on the app from config or environment.
+
+    DATABASE_URL selects the database (e.g. a postgresql:// URI) and
+    STORAGE_PROFILE picks the SQLite tuning profile ('tuned' or 'default').
+    """
+    uri = os.environ.get('DATABASE_URL') or app.config.get('SQLALCHEMY_DATABASE_URI') or DEFAULT_DATABASE_URI
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    profile = os.environ.get('STORAGE_PROFILE', app.config.get('STORAGE_PROFILE', 'tuned'))
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown STORAGE_PROFILE {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['STORAGE_PROFILE'] = profile
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update(engine_options(uri, profile))
+
+    if uri.startswith('sqlite') and SQLITE_PROFILES[profile]:
+        listen_for_sqlite(profile)
@@ -0,0 +1,171 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger('loan.write_behind')
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue that persists prediction rows in group commits.
+
+    Request threads call submit(); a single background worker drains the
+    queue and hands batches to flush_fn inside an app context, flushing when
+    batch_size rows are waiting or flush_interval seconds have passed. When
+    the queue is full, submit() waits up to put_timeout and then returns
+    False so the caller can write synchronously instead (backpressure).
+
+    flush_fn must be all-or-nothing (one transaction), so a failed batch
+    can be retried safely. It is retried `retries` times with doubling
+    backoff (a locked database usually clears within that), then written
+    row by row so only the rows that still fail are counted as failed.
+    """
+
+    _STOP = object()
+
+    def __init__(self, app, flush_fn, max_size=10000, batch_size=500,
+                 flush_interval=0.05, put_timeout=0.5, retries=3, retry_backoff=0.05):
+        self.app = app
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0, 'rejected': 0, 'flushed': 0, 'failed': 0, 'retries': 0, 'row_fallbacks': 0,
+            'flushes': 0, 'flush_ms_total': 0.0, 'flush_ms_max': 0.0, 'flush_ms_last': 0.0
+        }
+
+    def start(self):
+        """Start the worker thread and drain the queue on interpreter exit"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def submit(self, row):
+        """Queue one row for persistence; False if the queue stayed full"""
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            self._count('rejected')
+            return False
+        self._count('enqueued')
+        return True
+
+    def after_fork(self):
+        """Restart in a forked worker: threads and queue locks do not survive fork()"""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        return self.start()
+
+    def stop(self, timeout=10):
+        """Flush everything still queued and stop the worker"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self):
+        """Queue depth and flush statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+        flushes = stats.pop('flushes')
+        total_ms = stats.pop('flush_ms_total')
+        stats.update(
+            depth=self._queue.qsize(),
+            max_size=self._queue.maxsize,
+            flushes=flushes,
+            flush_ms_avg=round(total_ms / flushes, 3) if flushes else 0.0,
+            running=self._thread is not None and self._thread.is_alive()
+        )
+        return stats
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if stopping:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not self._STOP:
+                        batch.append(item)
+
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        written = len(batch)
+        if not self._write_with_retries(batch):
+            self._count('row_fallbacks')
+            written = sum(self._write(row) for row in batch)
+            if written < len(batch):
+                self._count('failed', len(batch) - written)
+                logger.error("event=write_behind_rows_dropped rows=%d of=%d", len(batch) - written, len(batch))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._stats['flushed'] += written
+            self._stats['flushes'] += 1
+            self._stats['flush_ms_total'] += elapsed_ms
+            self._stats['flush_ms_last'] = round(elapsed_ms, 3)
+            self._stats['flush_ms_max'] = round(max(self._stats['flush_ms_max'], elapsed_ms), 3)
+
+    def _write_with_retries(self, batch):
+        """flush_fn(batch), retried with backoff; False when every attempt failed"""
+        delay = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            try:
+                with self.app.app_context():
+                    self.flush_fn(batch)
+                return True
+            except Exception as e:
+                logger.warning("event=write_behind_flush_failed rows=%d attempt=%d error=%r",
+                               len(batch), attempt + 1, str(e))
+            if attempt < self.retries:
+                self._count('retries')
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+    def _write(self, row):
+        """Persist one row on its own (after the batch kept failing)"""
+        try:
+            with self.app.app_context():
+                self.flush_fn([row])
+            return True
+        except Exception as e:
+            logger.error("event=write_behind_row_failed session=%s error=%r", row.get('session_id'), str(e))
+            return False
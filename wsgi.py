@@ -0,0 +1,12 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The model, templates and database engine are loaded here once, in the
+master process, before workers are forked (see gunicorn.conf.py).
+"""
+import os
+
+os.environ.setdefault('PRELOAD_MODEL', '1')
+
+from app import app, after_fork  # noqa: E402,F401